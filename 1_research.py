@@ -1,125 +1,232 @@
-import requests
-from bs4 import BeautifulSoup
-from openai import OpenAI
-import cohere
-import json
-
-# API Keys
-SERPER_API_KEY = "your serper key"  
-COHERE_API_KEY = "your cohere key"
-co = cohere.Client(COHERE_API_KEY)
-
-def fetch_industry_trends(industry, num_results=5):
-    """
-    Fetches industry trends using the Serper REST API.
-    """
-    try:
-        query = f"{industry} industry trends 2025"
-        headers = {"X-API-KEY": SERPER_API_KEY}
-        payload = {"q": query}
-        response = requests.post("https://google.serper.dev/search", headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
-
-        trends = [
-            f"{result.get('title', 'No title available')} - {result.get('link', 'No link available')}"
-            for result in data.get("organic", [])
-        ]
-        return trends[:num_results]
-    except Exception as e:
-        return [f"Error fetching industry trends: {str(e)}"]
-
-def fetch_competitors(company_name):
-    """
-    Fetches competitors of the given company using Serper API.
-    """
-    try:
-        headers = {"X-API-KEY": SERPER_API_KEY}
-        payload = {"q": f"{company_name} competitors"}
-        response = requests.post("https://google.serper.dev/search", headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
-
-        competitors = [
-            f"{result.get('title', 'No title available')} - {result.get('link', 'No link available')}"
-            for result in data.get("organic", [])
-        ]
-        return competitors[:5]
-    except Exception as e:
-        return [f"Error fetching competitors: {str(e)}"]
-
-def fetch_insights_with_cohere(industry):
-    """
-    Fetches AI/ML insights using Cohere API.
-    """
-    try:
-        prompt = (
-            f"Provide detailed insights into AI/ML trends in the {industry} industry. Focus on:\n"
-            f"1. Disruptive AI-powered solutions in manufacturing and logistics.\n"
-            f"2. Enhancements to customer experience using AI.\n"
-            f"3. Emerging opportunities for Generative AI in the industry."
-        )
-        response = co.generate(
-            model="command-xlarge",
-            prompt=prompt,
-            max_tokens=750,
-            temperature=0.7,
-        )
-        return response.generations[0].text.strip()
-    except Exception as e:
-        return f"Error fetching insights with Cohere: {str(e)}"
-
-def fetch_company_details(company_name):
-    """
-    Fetches basic company details using Serper API.
-    """
-    try:
-        headers = {"X-API-KEY": SERPER_API_KEY}
-        payload = {"q": f"{company_name} company overview"}
-        response = requests.post("https://google.serper.dev/search", headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
-
-        if "organic" in data and len(data["organic"]) > 0:
-            result = data["organic"][0]
-            return {
-                "name": company_name,
-                "description": result.get("snippet", "No description found."),
-                "url": result.get("link", "https://www.example.com"),
-            }
-        return {"name": company_name, "description": "No description found.", "url": "https://www.example.com"}
-    except Exception as e:
-        return {"name": company_name, "description": f"Error fetching details: {str(e)}", "url": ""}
-
-def enhanced_fetch_research_data(industry, company_name):
-    """
-    Fetches research data and saves it to a JSON file.
-    """
-    try:
-        # Gather data
-        industry_trends = fetch_industry_trends(industry)
-        competitors = fetch_competitors(company_name)
-        ai_insights = fetch_insights_with_cohere(industry)
-        company_details = fetch_company_details(company_name)
-
-        # Combine results
-        research_data = {
-            "industry_trends": industry_trends,
-            "competitors": competitors,
-            "ai_insights": ai_insights,
-            "company_details": company_details,
-        }
-
-        # Save to file
-        with open("research_output.json", "w") as file:
-            json.dump(research_data, file, indent=4)
-
-        print("\nResearch data saved to 'research_output.json'")
-        return research_data
-    except Exception as e:
-        print(f"Error fetching research data: {str(e)}")
-
-if __name__ == "__main__":
-    industry = input("Enter the industry to research: ")
-    company_name = input("Enter the company name: ")
-    enhanced_fetch_research_data(industry, company_name)
+import http_client
+from bs4 import BeautifulSoup
+from openai import OpenAI
+import cohere
+import csv
+import json
+import os
+import re
+import time
+import argparse
+import telemetry
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from rate_limit import billed_tokens
+from response_cache import cached_call
+
+# API Keys
+SERPER_API_KEY = "your serper key"  
+COHERE_API_KEY = "your cohere key"
+
+# Concurrency settings
+RESEARCH_TIMEOUT = 60  # Seconds allowed for each provider call
+BATCH_CONCURRENCY = 4  # Companies researched at the same time in batch mode
+
+co = cohere.Client(COHERE_API_KEY, timeout=RESEARCH_TIMEOUT)
+
+def serper_search(query):
+    """
+    Runs a Serper search, serving repeated queries from the response cache.
+    """
+    payload = {"q": query}
+
+    def search():
+        headers = {"X-API-KEY": SERPER_API_KEY}
+        response = http_client.post("https://google.serper.dev/search", headers=headers, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    return cached_call("serper", "search", payload, search)
+
+def fetch_industry_trends(industry, num_results=5):
+    """
+    Fetches industry trends using the Serper REST API.
+    """
+    try:
+        query = f"{industry} industry trends 2025"
+        data = serper_search(query)
+
+        trends = [
+            f"{result.get('title', 'No title available')} - {result.get('link', 'No link available')}"
+            for result in data.get("organic", [])
+        ]
+        return trends[:num_results]
+    except Exception as e:
+        return [f"Error fetching industry trends: {str(e)}"]
+
+def fetch_competitors(company_name):
+    """
+    Fetches competitors of the given company using Serper API.
+    """
+    try:
+        data = serper_search(f"{company_name} competitors")
+
+        competitors = [
+            f"{result.get('title', 'No title available')} - {result.get('link', 'No link available')}"
+            for result in data.get("organic", [])
+        ]
+        return competitors[:5]
+    except Exception as e:
+        return [f"Error fetching competitors: {str(e)}"]
+
+def insights_params(industry):
+    """
+    Builds the Cohere generate request for industry AI/ML insights.
+    """
+    prompt = (
+        f"Provide detailed insights into AI/ML trends in the {industry} industry. Focus on:\n"
+        f"1. Disruptive AI-powered solutions in manufacturing and logistics.\n"
+        f"2. Enhancements to customer experience using AI.\n"
+        f"3. Emerging opportunities for Generative AI in the industry."
+    )
+    return {"model": "command-xlarge", "prompt": prompt, "max_tokens": 750, "temperature": 0.7}
+
+def cohere_generate(params):
+    """
+    One uncached Cohere generate call; its token counts are added to the current trace span.
+    """
+    response = co.generate(**params)
+    text = response.generations[0].text
+    tokens_in, tokens_out = billed_tokens(response, params["prompt"], text)
+    telemetry.annotate(tokens_in=tokens_in, tokens_out=tokens_out)
+    return text
+
+def fetch_insights_with_cohere(industry):
+    """
+    Fetches AI/ML insights using Cohere API.
+    """
+    try:
+        params = insights_params(industry)
+        text = cached_call("cohere", "generate", params, lambda: cohere_generate(params))
+        return text.strip()
+    except Exception as e:
+        return f"Error fetching insights with Cohere: {str(e)}"
+
+def fetch_company_details(company_name):
+    """
+    Fetches basic company details using Serper API.
+    """
+    try:
+        data = serper_search(f"{company_name} company overview")
+
+        if "organic" in data and len(data["organic"]) > 0:
+            result = data["organic"][0]
+            return {
+                "name": company_name,
+                "description": result.get("snippet", "No description found."),
+                "url": result.get("link", "https://www.example.com"),
+            }
+        return {"name": company_name, "description": "No description found.", "url": "https://www.example.com"}
+    except Exception as e:
+        return {"name": company_name, "description": f"Error fetching details: {str(e)}", "url": ""}
+
+def gather_research_data(industry, company_name, timeout=RESEARCH_TIMEOUT):
+    """
+    Runs the four research lookups concurrently and combines their results.
+    Any call still running after `timeout` seconds is abandoned and replaced by an error entry.
+    """
+    tasks = {
+        "industry_trends": (fetch_industry_trends, industry),
+        "competitors": (fetch_competitors, company_name),
+        "ai_insights": (fetch_insights_with_cohere, industry),
+        "company_details": (fetch_company_details, company_name),
+    }
+    timeout_message = f"timed out after {timeout} seconds"
+    fallbacks = {
+        "industry_trends": [f"Error fetching industry trends: {timeout_message}"],
+        "competitors": [f"Error fetching competitors: {timeout_message}"],
+        "ai_insights": f"Error fetching insights with Cohere: {timeout_message}",
+        "company_details": {"name": company_name, "description": f"Error fetching details: {timeout_message}", "url": ""},
+    }
+
+    executor = ThreadPoolExecutor(max_workers=len(tasks))
+    try:
+        futures = {key: executor.submit(func, arg) for key, (func, arg) in tasks.items()}
+        deadline = time.monotonic() + timeout
+
+        research_data = {}
+        for key, future in futures.items():
+            try:
+                research_data[key] = future.result(timeout=max(0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                future.cancel()
+                research_data[key] = fallbacks[key]
+        return research_data
+    finally:
+        # Don't block on calls that overran the deadline
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def save_research_data(research_data, path="research_output.json"):
+    """
+    Saves research data to a JSON file.
+    """
+    with open(path, "w") as file:
+        json.dump(research_data, file, indent=4)
+
+def enhanced_fetch_research_data(industry, company_name):
+    """
+    Fetches research data and saves it to a JSON file.
+    """
+    try:
+        # Gather data
+        research_data = gather_research_data(industry, company_name)
+
+        # Save to file
+        save_research_data(research_data)
+
+        print("\nResearch data saved to 'research_output.json'")
+        return research_data
+    except Exception as e:
+        print(f"Error fetching research data: {str(e)}")
+
+def company_slug(company_name):
+    """
+    Turns a company name into a filesystem-friendly identifier.
+    """
+    return re.sub(r"[^a-z0-9]+", "_", company_name.lower()).strip("_") or "company"
+
+def batch_fetch_research_data(pairs, max_concurrency=BATCH_CONCURRENCY, output_dir=None, timeout=RESEARCH_TIMEOUT):
+    """
+    Researches many (industry, company) pairs with at most `max_concurrency` companies in flight.
+    Returns the research data in the same order as `pairs`; when `output_dir` is given each
+    result is also saved to `research_output_<company>.json` in that directory.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    def research(pair):
+        industry, company_name = pair
+        try:
+            research_data = gather_research_data(industry, company_name, timeout=timeout)
+            if output_dir:
+                path = os.path.join(output_dir, f"research_output_{company_slug(company_name)}.json")
+                save_research_data(research_data, path)
+                print(f"Research data for {company_name} saved to '{path}'")
+            return research_data
+        except Exception as e:
+            print(f"Error fetching research data for {company_name}: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        return list(executor.map(research, pairs))
+
+def read_batch_file(path):
+    """
+    Reads (industry, company) pairs from a CSV file with one pair per row.
+    """
+    with open(path, newline="") as file:
+        return [(row[0].strip(), row[1].strip()) for row in csv.reader(file) if len(row) >= 2 and row[0].strip()]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Research Agent")
+    parser.add_argument("--batch", help="CSV file of industry,company rows to research in one run")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Companies researched at the same time")
+    parser.add_argument("--output-dir", default="research_outputs", help="Directory for batch results")
+    args = parser.parse_args()
+    telemetry.start_run("research")
+
+    if args.batch:
+        batch_fetch_research_data(read_batch_file(args.batch), max_concurrency=args.concurrency, output_dir=args.output_dir)
+    else:
+        industry = input("Enter the industry to research: ")
+        company_name = input("Enter the company name: ")
+        enhanced_fetch_research_data(industry, company_name)
@@ -1,67 +1,296 @@
+import os
 import json
+import time
+import argparse
+import importlib
 import cohere
+import telemetry
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from rate_limit import RateLimiter, billed_tokens, estimate_tokens
+from response_cache import cached_call
 
 # Initialize Cohere Client
 COHERE_API_KEY = "your cohere key"
 co = cohere.Client(COHERE_API_KEY)
 
-def generate_use_cases(industry_trends, company_details, competitors):
+# Structured generation settings
+STRUCTURED_MODEL = "command-r"  # Chat model that supports JSON schema constrained output
+NUM_USE_CASES = 5
+MAX_REPAIR_ATTEMPTS = 2  # Extra generations allowed to fix output that fails validation
+USE_CASE_MAX_TOKENS = 1500
+EXPECTED_COMPLETION_TOKENS = 160 * NUM_USE_CASES  # Typical completion size, reserved from the token budget
+
+# Batch generation budget and pricing (USD per 1K tokens, used for per-record cost reports)
+BATCH_CONCURRENCY = 4
+REQUESTS_PER_MINUTE = int(os.getenv("COHERE_REQUESTS_PER_MINUTE", "20"))
+TOKENS_PER_MINUTE = int(os.getenv("COHERE_TOKENS_PER_MINUTE", "100000"))
+COST_PER_1K_INPUT_TOKENS = float(os.getenv("COHERE_COST_PER_1K_INPUT_TOKENS", "0.00015"))
+COST_PER_1K_OUTPUT_TOKENS = float(os.getenv("COHERE_COST_PER_1K_OUTPUT_TOKENS", "0.0006"))
+
+USE_CASE_PROMPT = (
+    "{context}"
+    "Generate {count} innovative and actionable AI or Generative AI use cases for {company}. "
+    "For each use case give a short title, the problem it solves, the AI/GenAI solution, the impact or "
+    "benefit, and how it differentiates {company} from its competitors.\n"
+    "Make sure all use cases are concise, relevant, and align with {company}'s vision. "
+    "Respond with a JSON object of the form "
+    '{{"use_cases": [{{"title": ..., "problem": ..., "solution": ..., "impact": ..., "differentiation": ...}}]}}.'
+)
+
+USE_CASE_FIELDS = ("title", "problem", "solution", "impact", "differentiation")
+USE_CASE_SCHEMA = {
+    "type": "object",
+    "required": ["use_cases"],
+    "properties": {
+        "use_cases": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": list(USE_CASE_FIELDS),
+                "properties": {field: {"type": "string"} for field in USE_CASE_FIELDS},
+            },
+        },
+    },
+}
+
+
+@dataclass
+class UseCase:
+    title: str
+    problem: str
+    solution: str
+    impact: str
+    differentiation: str
+
+
+class UseCaseValidationError(ValueError):
+    """Raised when generated use cases don't match the schema."""
+
+
+@dataclass
+class UseCaseBatchResult:
+    industry: str
+    company: str
+    use_cases: list = None  # UseCase objects, None if generation failed
+    error: str = None
+    latency: float = 0.0  # Seconds from dispatch to result, including time waiting on the budget
+    budget_wait: float = 0.0  # Seconds spent waiting for the rate limit
+    requests: int = 0  # API calls made; cached responses cost none
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+
+
+def build_context(industry_trends, company_details, competitors, industry, company_name):
+    """
+    Builds the research context shared by the use case prompts.
     """
-    Generates AI/GenAI use cases using Cohere's API, enhanced with industry trends and competitor analysis.
+    # Trim industry trends and competitors for concise input
+    industry_trends_short = "\n".join([trend.split(" - ")[0] for trend in industry_trends])
+    competitors_short = "\n".join([comp.split(" - ")[0] for comp in competitors])
+    industry = industry or f"{company_name}'s"
+    return (
+        f"The following are key trends in the {industry} industry:\n{industry_trends_short}\n\n"
+        f"The following companies are competitors:\n{competitors_short}\n\n"
+        f"{company_name}'s focus:\n{company_details}\n\n"
+    )
+
+def build_use_case_prompt(industry_trends, company_details, competitors, industry, company_name, count=NUM_USE_CASES):
+    """
+    Fills the structured use case prompt template for one company.
+    """
+    context = build_context(industry_trends, company_details, competitors, industry, company_name)
+    return USE_CASE_PROMPT.format(context=context, count=count, company=company_name)
+
+def parse_use_cases_json(text, expected=NUM_USE_CASES):
+    """
+    Parses and validates generated JSON into UseCase objects.
     """
     try:
-        # Trim industry trends and competitors for concise input
-        industry_trends_short = "\n".join([trend.split(" - ")[0] for trend in industry_trends])
-        competitors_short = "\n".join([comp.split(" - ")[0] for comp in competitors])
-
-        # Refined prompt with trends and competitor context
-        prompt = (
-            f"The following are key trends in the automotive industry:\n{industry_trends_short}\n\n"
-            f"The following companies are competitors:\n{competitors_short}\n\n"
-            f"Tesla's focus:\n{company_details}\n\n"
-            f"Generate 5 innovative and actionable AI or Generative AI use cases for Tesla. For each use case, include:\n"
-            f"1. The Problem it solves.\n"
-            f"2. The AI/GenAI Solution.\n"
-            f"3. The Impact or benefit of the solution.\n"
-            f"4. How it differentiates Tesla from its competitors.\n\n"
-            f"Format each use case as:\n"
-            f"### Use Case [Number]: [Title]\n"
-            f"**Problem**: [Description]\n"
-            f"**Solution**: [Description]\n"
-            f"**Impact**: [Description]\n"
-            f"**Differentiation**: [Description]\n\n"
-            f"Make sure all use cases are concise, relevant, and align with Tesla's vision."
-        )
+        data = json.loads(text)
+    except ValueError as e:
+        raise UseCaseValidationError(f"Output is not valid JSON: {e}")
+    items = data.get("use_cases") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise UseCaseValidationError("Output must be an object with a 'use_cases' array")
+    if len(items) != expected:
+        raise UseCaseValidationError(f"Expected {expected} use cases, got {len(items)}")
+
+    use_cases = []
+    for number, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            raise UseCaseValidationError(f"Use case {number} must be an object")
+        missing = [field for field in USE_CASE_FIELDS if not isinstance(item.get(field), str) or not item[field].strip()]
+        if missing:
+            raise UseCaseValidationError(f"Use case {number} is missing {', '.join(missing)}")
+        use_cases.append(UseCase(**{field: item[field].strip() for field in USE_CASE_FIELDS}))
+    return use_cases
+
+def _chat(params, limiter=None, usage=None):
+    # One uncached chat call, held back by the rate limiter and recorded in `usage` and the trace
+    reserved = estimate_tokens(params["message"]) + EXPECTED_COMPLETION_TOKENS
+    waited = limiter.acquire(reserved) if limiter else 0.0
+    response = co.chat(**params)
+    tokens_in, tokens_out = billed_tokens(response, params["message"], response.text)
+    telemetry.annotate(tokens_in=tokens_in, tokens_out=tokens_out, budget_wait=round(waited, 3))
+    if usage is not None:
+        usage["budget_wait"] = usage.get("budget_wait", 0.0) + waited
+        usage["requests"] = usage.get("requests", 0) + 1
+        usage["input_tokens"] = usage.get("input_tokens", 0) + tokens_in
+        usage["output_tokens"] = usage.get("output_tokens", 0) + tokens_out
+    return response.text
+
+def generate_structured_use_cases(industry_trends, company_details, competitors, industry, company_name,
+                                  max_repairs=MAX_REPAIR_ATTEMPTS, limiter=None, usage=None):
+    """
+    Generates use cases as validated UseCase objects using schema-constrained JSON output.
+    Output that fails validation is sent back with the error for at most `max_repairs` repair attempts;
+    UseCaseValidationError is raised if it still doesn't validate.
+    API calls wait on `limiter` (a RateLimiter) when given, and their token counts are added to `usage`.
+    """
+    prompt = build_use_case_prompt(industry_trends, company_details, competitors, industry, company_name)
+
+    message = prompt
+    for attempt in range(max_repairs + 1):
+        params = {
+            "model": STRUCTURED_MODEL,
+            "message": message,
+            "max_tokens": USE_CASE_MAX_TOKENS,
+            "temperature": 0.3 if attempt else 0.7,
+            "response_format": {"type": "json_object", "schema": USE_CASE_SCHEMA},
+        }
+        generated = []
 
-        # Generate use cases using Cohere API
-        response = co.generate(
-            model="command-xlarge",
-            prompt=prompt,
-            max_tokens=1000,
-            temperature=0.7,
+        def chat():
+            generated.append(_chat(params, limiter, usage))
+            parse_use_cases_json(generated[-1])  # Raises on invalid output, so only valid JSON is cached
+            return generated[-1]
+
+        try:
+            return parse_use_cases_json(cached_call("cohere", "chat", params, chat))
+        except UseCaseValidationError as e:
+            error = e
+            text = generated[-1] if generated else ""
+            print(f"Use case output failed validation (attempt {attempt + 1}): {e}")
+            message = (
+                f"{prompt}\n\nA previous answer was rejected because: {e}\n"
+                f"Previous answer:\n{text}\n\nReturn a corrected JSON object only."
+            )
+    raise UseCaseValidationError(f"Use cases failed validation after {max_repairs + 1} attempts: {error}")
+
+def generate_use_cases_batch(records, max_concurrency=BATCH_CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE,
+                             tokens_per_minute=TOKENS_PER_MINUTE):
+    """
+    Generates use cases for many companies. `records` are dicts with "industry", "company" and "research"
+    (research data as saved by the Research Agent). Requests run concurrently under one requests-per-minute
+    and tokens-per-minute budget; the largest prompts are dispatched first so smaller ones fill the gaps.
+    Returns a UseCaseBatchResult per record, in input order, with latency, token usage and cost.
+    """
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    records = list(records)
+
+    def generate(record):
+        research = record["research"]
+        result = UseCaseBatchResult(record["industry"], record["company"])
+        usage = {}
+        start = time.perf_counter()
+        try:
+            result.use_cases = generate_structured_use_cases(
+                research["industry_trends"], research["company_details"]["description"], research["competitors"],
+                industry=record["industry"], company_name=record["company"], limiter=limiter, usage=usage,
+            )
+        except Exception as e:
+            result.error = str(e)
+            print(f"Error generating use cases for {record['company']}: {result.error}")
+        result.latency = time.perf_counter() - start
+        result.budget_wait = usage.get("budget_wait", 0.0)
+        result.requests = usage.get("requests", 0)
+        result.input_tokens = usage.get("input_tokens", 0)
+        result.output_tokens = usage.get("output_tokens", 0)
+        result.cost = (
+            result.input_tokens * COST_PER_1K_INPUT_TOKENS + result.output_tokens * COST_PER_1K_OUTPUT_TOKENS
+        ) / 1000
+        return result
+
+    def prompt_size(record):
+        research = record["research"]
+        return estimate_tokens(build_use_case_prompt(
+            research["industry_trends"], research["company_details"]["description"], research["competitors"],
+            record["industry"], record["company"],
+        ))
+
+    order = sorted(range(len(records)), key=lambda i: prompt_size(records[i]), reverse=True)
+    results = [None] * len(records)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        for i, result in zip(order, executor.map(generate, [records[i] for i in order])):
+            results[i] = result
+    return results
+
+def print_batch_summary(results):
+    """
+    Prints latency, token usage and cost for each record of a batch run.
+    """
+    header = f"{'company':<28} {'status':<7} {'latency s':>9} {'wait s':>7} {'calls':>5} {'in tok':>7} {'out tok':>7} {'cost $':>8}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        status = "error" if result.error else "ok"
+        print(
+            f"{result.company[:28]:<28} {status:<7} {result.latency:>9.2f} {result.budget_wait:>7.2f} {result.requests:>5} "
+            f"{result.input_tokens:>7} {result.output_tokens:>7} {result.cost:>8.4f}"
         )
+    print("-" * len(header))
+    print(
+        f"{'total':<28} {sum(not r.error for r in results):>3}/{len(results):<3} {'':>9} {'':>7} "
+        f"{sum(r.requests for r in results):>5} {sum(r.input_tokens for r in results):>7} "
+        f"{sum(r.output_tokens for r in results):>7} {sum(r.cost for r in results):>8.4f}"
+    )
+
+def format_use_cases_markdown(use_cases):
+    """
+    Renders structured use cases in the Markdown format used by the report.
+    """
+    return "\n\n".join(
+        f"### Use Case {number}: {use_case.title}\n"
+        f"**Problem**: {use_case.problem}\n"
+        f"**Solution**: {use_case.solution}\n"
+        f"**Impact**: {use_case.impact}\n"
+        f"**Differentiation**: {use_case.differentiation}"
+        for number, use_case in enumerate(use_cases, 1)
+    )
 
-        # Return the generated text
-        return response.generations[0].text.strip()
+def save_use_cases_to_json(use_cases, path="use_cases.json"):
+    """
+    Saves structured use cases to a JSON file.
+    """
+    with open(path, "w") as file:
+        json.dump({"use_cases": [asdict(use_case) for use_case in use_cases]}, file, indent=4)
+    print(f"\nUse cases saved to '{path}'")
 
-    except Exception as e:
-        return f"Error generating use cases: {str(e)}"
+def load_use_cases_from_json(path="use_cases.json"):
+    """
+    Loads structured use cases saved by save_use_cases_to_json.
+    """
+    with open(path, "r") as file:
+        data = json.load(file)
+    return [UseCase(**item) for item in data["use_cases"]]
 
-def save_use_cases_to_markdown(use_cases):
+def save_use_cases_to_markdown(use_cases, path="use_cases.md"):
     """
     Saves the generated use cases to a Markdown file.
     """
     try:
-        with open("use_cases.md", "w") as file:
+        with open(path, "w") as file:
             file.write("# Generated Use Cases\n\n")
             file.write(use_cases)
-        print("\nUse cases saved to 'use_cases.md'")
+        print(f"\nUse cases saved to '{path}'")
     except Exception as e:
         print(f"Error saving use cases to Markdown: {str(e)}")
 
-def use_case_agent():
+def use_case_agent(industry=None):
     """
-    Reads research data from a file, generates use cases, and saves them to a Markdown file.
+    Reads research data from a file, generates use cases, and saves them to JSON and Markdown files.
     """
     try:
         # Load research data from the JSON file
@@ -71,18 +300,67 @@ def use_case_agent():
         # Extract inputs for Use Case Agent
         industry_trends = research_data["industry_trends"]
         company_details = research_data["company_details"]["description"]
+        company_name = research_data["company_details"]["name"]
         competitors = research_data["competitors"]
 
         # Generate use cases
-        raw_use_cases = generate_use_cases(industry_trends, company_details, competitors)
+        use_cases = generate_structured_use_cases(industry_trends, company_details, competitors, industry, company_name)
 
-        # Save use cases to Markdown file
-        save_use_cases_to_markdown(raw_use_cases)
+        # Save use cases as JSON for the downstream agents and as Markdown for reading
+        save_use_cases_to_json(use_cases)
+        save_use_cases_to_markdown(format_use_cases_markdown(use_cases))
 
     except FileNotFoundError:
         print("Error: 'research_output.json' not found. Please run the Research Agent first.")
     except Exception as e:
         print(f"Error in Use Case Agent: {str(e)}")
 
+def batch_use_case_agent(batch_path, research_dir, output_dir, max_concurrency=BATCH_CONCURRENCY,
+                         requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+    """
+    Generates use cases for every industry,company row of a CSV file from the research saved by the
+    Research Agent's batch mode, and writes use cases and a cost/latency summary to `output_dir`.
+    """
+    research_agent = importlib.import_module("1_research")
+    records = []
+    for industry, company in research_agent.read_batch_file(batch_path):
+        path = os.path.join(research_dir, f"research_output_{research_agent.company_slug(company)}.json")
+        try:
+            with open(path, "r") as file:
+                records.append({"industry": industry, "company": company, "research": json.load(file)})
+        except FileNotFoundError:
+            print(f"Error: '{path}' not found. Please run the Research Agent batch for {company} first.")
+
+    results = generate_use_cases_batch(records, max_concurrency, requests_per_minute, tokens_per_minute)
+    os.makedirs(output_dir, exist_ok=True)
+    for result in results:
+        if result.use_cases:
+            slug = research_agent.company_slug(result.company)
+            save_use_cases_to_json(result.use_cases, os.path.join(output_dir, f"use_cases_{slug}.json"))
+            save_use_cases_to_markdown(
+                format_use_cases_markdown(result.use_cases), os.path.join(output_dir, f"use_cases_{slug}.md")
+            )
+    with open(os.path.join(output_dir, "batch_summary.json"), "w") as file:
+        summary = [{key: value for key, value in asdict(result).items() if key != "use_cases"} for result in results]
+        json.dump(summary, file, indent=4)
+
+    print()
+    print_batch_summary(results)
+    return results
+
 if __name__ == "__main__":
-    use_case_agent()
+    parser = argparse.ArgumentParser(description="Use Case Agent")
+    parser.add_argument("--industry", help="Industry of the researched company")
+    parser.add_argument("--batch", help="CSV file of industry,company rows researched with the Research Agent's --batch")
+    parser.add_argument("--research-dir", default="research_outputs", help="Directory of batch research results")
+    parser.add_argument("--output-dir", default="use_case_outputs", help="Directory for batch results")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Requests in flight at the same time")
+    parser.add_argument("--rpm", type=int, default=REQUESTS_PER_MINUTE, help="Requests per minute budget (0 for none)")
+    parser.add_argument("--tpm", type=int, default=TOKENS_PER_MINUTE, help="Tokens per minute budget (0 for none)")
+    args = parser.parse_args()
+    telemetry.start_run("use_cases")
+
+    if args.batch:
+        batch_use_case_agent(args.batch, args.research_dir, args.output_dir, args.concurrency, args.rpm, args.tpm)
+    else:
+        use_case_agent(args.industry)
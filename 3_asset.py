@@ -1,13 +1,20 @@
 import os
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from kaggle.api.kaggle_api_extended import KaggleApi
-import requests
+import http_client
+import telemetry
+from response_cache import cached_call
 
 # API Keys and Configurations
 HUGGINGFACE_API_KEY = "your hugging face token"
 GITHUB_API_KEY = "your github secret"
 KAGGLE_JSON_PATH = r"location to your kaggle api json file"
 
+# Maximum in-flight searches per provider during discovery
+PROVIDER_CONCURRENCY = {"kaggle": 2, "huggingface": 4, "github": 2}
+
 
 def setup_kaggle_api(api_path):
     if not os.path.exists(api_path):
@@ -17,36 +24,59 @@ def setup_kaggle_api(api_path):
     os.environ["KAGGLE_USERNAME"] = kaggle_config["username"]
     os.environ["KAGGLE_KEY"] = kaggle_config["key"]
 
+_kaggle_api = None
+_kaggle_lock = threading.Lock()
+
+def get_kaggle_api():
+    """
+    Returns a Kaggle client, authenticating once per process.
+    """
+    global _kaggle_api
+    with _kaggle_lock:
+        if _kaggle_api is None:
+            api = KaggleApi()
+            api.authenticate()
+            _kaggle_api = api
+        return _kaggle_api
+
 def fetch_kaggle_datasets(query, num_results=5):
     try:
-        api = KaggleApi()
-        api.authenticate()
-        datasets = api.dataset_list(search=query)
-        return [f"{dataset.ref} - https://www.kaggle.com/{dataset.ref}" for dataset in datasets[:num_results]]
+        def search():
+            api = get_kaggle_api()
+            return [dataset.ref for dataset in api.dataset_list(search=query)]
+
+        refs = cached_call("kaggle", "dataset_list", {"search": query}, search)
+        return [f"{ref} - https://www.kaggle.com/{ref}" for ref in refs[:num_results]]
     except Exception as e:
         return [f"Error fetching datasets from Kaggle: {str(e)}"]
 
 def fetch_huggingface_datasets(query):
     try:
-        response = requests.get(
-            f"https://huggingface.co/api/datasets?search={query}",
-            headers={"Authorization": f"Bearer {HUGGINGFACE_API_KEY}"},
-        )
-        response.raise_for_status()
-        datasets = response.json()
+        def search():
+            response = http_client.get(
+                f"https://huggingface.co/api/datasets?search={query}",
+                headers={"Authorization": f"Bearer {HUGGINGFACE_API_KEY}"},
+            )
+            response.raise_for_status()
+            return response.json()
+
+        datasets = cached_call("huggingface", "datasets", {"search": query}, search)
         return [f"{dataset['id']} - https://huggingface.co/datasets/{dataset['id']}" for dataset in datasets[:5]]
     except Exception as e:
         return [f"Error fetching datasets from HuggingFace: {str(e)}"]
 
 def fetch_github_datasets(query):
     try:
-        headers = {"Authorization": f"token {GITHUB_API_KEY}"}
-        response = requests.get(
-            f"https://api.github.com/search/repositories?q={query}+dataset",
-            headers=headers,
-        )
-        response.raise_for_status()
-        repositories = response.json()["items"]
+        def search():
+            headers = {"Authorization": f"token {GITHUB_API_KEY}"}
+            response = http_client.get(
+                f"https://api.github.com/search/repositories?q={query}+dataset",
+                headers=headers,
+            )
+            response.raise_for_status()
+            return response.json()["items"]
+
+        repositories = cached_call("github", "search_repositories", {"q": query}, search)
         return [f"{repo['full_name']} - {repo['html_url']}" for repo in repositories[:5]]
     except Exception as e:
         return [f"Error fetching datasets from GitHub: {str(e)}"]
@@ -64,50 +94,111 @@ def refine_query(use_case, problem):
     }
     return keywords.get(use_case, problem)
 
-def save_resources_to_markdown(use_cases, resources):
+PROVIDERS = {
+    "kaggle": fetch_kaggle_datasets,
+    "huggingface": fetch_huggingface_datasets,
+    "github": fetch_github_datasets,
+}
+
+def discover_datasets(queries):
+    """
+    Searches every provider for every use case concurrently.
+    `queries` maps use case titles to search queries; each provider has its own pool of
+    PROVIDER_CONCURRENCY[provider] workers, so a slow provider never holds up another's searches.
+    Results are merged as they arrive and returned per use case in provider order (Kaggle, HuggingFace, GitHub).
+    """
+    found = {use_case: {} for use_case in queries}
+    executors = {
+        provider: ThreadPoolExecutor(max_workers=PROVIDER_CONCURRENCY[provider], thread_name_prefix=f"assets-{provider}")
+        for provider in PROVIDERS
+    }
     try:
-        with open("resources.md", "w") as file:
-            file.write("# Resource Links\n\n")
-            for i, use_case in enumerate(use_cases, 1):
-                file.write(f"## Use Case {i}: {use_case}\n")
-                file.write("### Relevant Datasets:\n")
-                if use_case in resources and resources[use_case]:
-                    for resource in resources[use_case]:
-                        file.write(f"- {resource}\n")
-                else:
-                    file.write("- No relevant datasets found. Consider refining the query.\n")
-                file.write("\n")
-        print("\nResources saved to 'resources.md'")
+        futures = {
+            executors[provider].submit(search, query): (use_case, provider)
+            for use_case, query in queries.items()
+            for provider, search in PROVIDERS.items()
+        }
+        for future in as_completed(futures):
+            use_case, provider = futures[future]
+            found[use_case][provider] = future.result()
+            print(f"Fetched {provider} datasets for: {use_case}")
+    finally:
+        for executor in executors.values():
+            executor.shutdown()
+
+    return {
+        use_case: [dataset for provider in PROVIDERS for dataset in by_provider.get(provider, [])]
+        for use_case, by_provider in found.items()
+    }
+
+def format_resources_markdown(use_cases, resources):
+    """
+    Renders the datasets found for each use case as Markdown.
+    """
+    lines = ["# Resource Links\n\n"]
+    for i, use_case in enumerate(use_cases, 1):
+        lines.append(f"## Use Case {i}: {use_case}\n")
+        lines.append("### Relevant Datasets:\n")
+        if use_case in resources and resources[use_case]:
+            for resource in resources[use_case]:
+                lines.append(f"- {resource}\n")
+        else:
+            lines.append("- No relevant datasets found. Consider refining the query.\n")
+        lines.append("\n")
+    return "".join(lines)
+
+def save_resources_to_markdown(use_cases, resources, path="resources.md"):
+    try:
+        with open(path, "w") as file:
+            file.write(format_resources_markdown(use_cases, resources))
+        print(f"\nResources saved to '{path}'")
     except Exception as e:
         print(f"Error saving resources to Markdown: {str(e)}")
 
+def parse_use_cases(markdown):
+    """
+    Extracts use case titles and problem descriptions from use case Markdown.
+    Only used for Markdown written before use cases were saved as JSON.
+    """
+    lines = markdown.splitlines()
+    use_cases = [line.split(": ", 1)[1].strip() for line in lines if line.startswith("### Use Case")]
+    problem_descriptions = [
+        lines[i + 1].replace("**Problem:**", "").replace("**Problem**:", "").strip() if i + 1 < len(lines) else ""
+        for i, line in enumerate(lines) if line.startswith("### Use Case")
+    ]
+    return use_cases, problem_descriptions
+
+def load_use_cases():
+    """
+    Returns use case titles and problems, from use_cases.json when available, else from use_cases.md.
+    """
+    if os.path.exists("use_cases.json"):
+        with open("use_cases.json", "r") as file:
+            items = json.load(file)["use_cases"]
+        return [item["title"] for item in items], [item["problem"] for item in items]
+    with open("use_cases.md", "r") as file:
+        return parse_use_cases(file.read())
+
+def find_resources(use_cases, problem_descriptions):
+    """
+    Builds a search query per use case and discovers datasets for all of them.
+    """
+    queries = {}
+    for use_case, problem in zip(use_cases, problem_descriptions):
+        queries[use_case] = refine_query(use_case, problem)
+        print(f"\nFetching datasets for: {use_case} with query: {queries[use_case]}")
+    return discover_datasets(queries)
+
 def resource_asset_agent():
     try:
         # Setup Kaggle API
         setup_kaggle_api(KAGGLE_JSON_PATH)
 
-        # Read use cases from Markdown file
-        with open("use_cases.md", "r") as file:
-            lines = file.readlines()
-
-        # Extract use case titles and problems
-        use_cases = [line.split(": ", 1)[1].strip() for line in lines if line.startswith("### Use Case")]
-        problem_descriptions = [
-            lines[i + 1].replace("**Problem:**", "").strip()
-            for i, line in enumerate(lines) if line.startswith("### Use Case")
-        ]
-
-        # Fetch datasets for each use case
-        resources = {}
-        for use_case, problem in zip(use_cases, problem_descriptions):
-            query = refine_query(use_case, problem)
-            print(f"\nFetching datasets for: {use_case} with query: {query}")
-            kaggle_datasets = fetch_kaggle_datasets(query)
-            huggingface_datasets = fetch_huggingface_datasets(query)
-            github_datasets = fetch_github_datasets(query)
-
-            # Combine datasets
-            resources[use_case] = kaggle_datasets + huggingface_datasets + github_datasets
+        # Read use cases written by the Use Case Agent
+        use_cases, problem_descriptions = load_use_cases()
+
+        # Fetch datasets for all use cases and providers concurrently
+        resources = find_resources(use_cases, problem_descriptions)
 
         # Save resources to Markdown
         save_resources_to_markdown(use_cases, resources)
@@ -116,4 +207,5 @@ def resource_asset_agent():
         print(f"Error in Resource Asset Agent: {str(e)}")
 
 if __name__ == "__main__":
+    telemetry.start_run("assets")
     resource_asset_agent()
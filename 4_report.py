@@ -1,66 +1,134 @@
+import os
 import json
-from fpdf import FPDF
-
-
-class PDFReport(FPDF):
-    def header(self):
-        if self.page_no() == 1:
-            return  # No header on the first page (cover page)
-        self.set_font("Arial", "I", 10)
-        self.cell(0, 10, "AI & GenAI Use Case Report", align="C", ln=True)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_font("Arial", "I", 8)
-        self.cell(0, 10, f"Page {self.page_no()}", align="C")
-
-    def add_cover_page(self, title, subtitle, date):
-        self.add_page()
-        self.set_font("Arial", "B", 20)
-        self.cell(0, 10, title, ln=True, align="C")
-        self.ln(10)
-        self.set_font("Arial", "I", 14)
-        self.cell(0, 10, subtitle, ln=True, align="C")
-        self.ln(20)
-        self.set_font("Arial", "", 12)
-        self.cell(0, 10, f"Date: {date}", ln=True, align="C")
-        self.ln(50)
-        self.set_font("Arial", "I", 12)
-        self.cell(0, 10, "Generated by AI Use Case Generator", align="C")
-
-    def add_section_title(self, title):
-        self.set_font("Arial", "B", 14)
-        self.cell(0, 10, title, ln=True, align="L")
-        self.ln(5)
-
-    def add_paragraph(self, text):
-        self.set_font("Arial", "", 12)
-        self.multi_cell(0, 10, text)
-        self.ln()
-
-    def add_bullet_point(self, text):
-        self.set_font("Arial", "", 12)
-        self.cell(10)  # Indentation
-        self.cell(0, 10, f"- {text}", ln=True)
-
-    def add_hyperlink(self, text, url):
-        self.set_font("Arial", "U", 12)
-        self.set_text_color(0, 0, 255)
-        self.cell(0, 10, text, link=url, ln=True)
-        self.set_text_color(0, 0, 0)
+import time
+import argparse
+import datetime
+import telemetry
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from report_render import render_report, report_blocks, warm_up
+
+# Bulk rendering settings
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", str(os.cpu_count() or 1)))
+MANIFEST_FILE = "manifest.json"
+
+
+def report_date():
+    """
+    The date shown on the cover page: the current month.
+    """
+    return datetime.date.today().strftime("%B %Y")
+
+
+def build_report(research_data, use_cases, resources, output_path="GenAI_Summary_Report.pdf", date=None):
+    """
+    Renders the report PDF from research data, use case Markdown and resources Markdown.
+    The Markdown is parsed once into blocks and rendered in a single pass, streaming pages to disk.
+    """
+    return render_report(report_blocks(research_data, use_cases, resources), output_path, date or report_date())
+
+
+def load_artifacts(directory):
+    """
+    Loads one company's research_output.json, use_cases.md and resources.md.
+    """
+    with open(os.path.join(directory, "research_output.json"), "r") as file:
+        research_data = json.load(file)
+    with open(os.path.join(directory, "use_cases.md"), "r") as file:
+        use_cases = file.read()
+    with open(os.path.join(directory, "resources.md"), "r") as file:
+        resources = file.read()
+    return research_data, use_cases, resources
+
+
+def render_company(directory, output_path, date):
+    """
+    Renders one company's report in a worker process and returns its manifest record.
+    """
+    record = {"source": directory, "output": output_path, "worker": os.getpid()}
+    start = time.perf_counter()
+    try:
+        research_data, use_cases, resources = load_artifacts(directory)
+        record["company"] = research_data.get("company_details", {}).get("name") or os.path.basename(directory)
+        loaded = time.perf_counter()
+        blocks = report_blocks(research_data, use_cases, resources)
+        parsed = time.perf_counter()
+        render_report(blocks, output_path, date)
+        done = time.perf_counter()
+        record.update(
+            status="ok",
+            bytes=os.path.getsize(output_path),
+            load_seconds=round(loaded - start, 4),
+            parse_seconds=round(parsed - loaded, 4),
+            render_seconds=round(done - parsed, 4),
+        )
+    except Exception as e:
+        record.update(company=record.get("company", os.path.basename(directory)), status="error", error=str(e))
+    record["total_seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def find_artifact_dirs(batch_dir):
+    """
+    Splits the subdirectories of `batch_dir` (such as pipeline_runs/ after a `pipeline.py --checkpoints`
+    batch) into those holding a complete artifact set and those missing files.
+    """
+    required = ("research_output.json", "use_cases.md", "resources.md")
+    complete, incomplete = [], []
+    for name in sorted(os.listdir(batch_dir)):
+        directory = os.path.join(batch_dir, name)
+        if os.path.isdir(directory):
+            has_all = all(os.path.exists(os.path.join(directory, file)) for file in required)
+            (complete if has_all else incomplete).append(directory)
+    return complete, incomplete
+
+
+def generate_reports(batch_dir, output_dir, workers=REPORT_WORKERS, date=None):
+    """
+    Renders a report for every artifact set in `batch_dir` across a process pool, writing
+    `<output_dir>/<company dir>.pdf` and a manifest with each report's status and timings.
+    """
+    directories, skipped = find_artifact_dirs(batch_dir)
+    for directory in skipped:
+        print(f"Skipping '{directory}': missing research_output.json, use_cases.md or resources.md")
+    os.makedirs(output_dir, exist_ok=True)
+    date = date or report_date()
+    start = time.perf_counter()
+    records = []
+
+    # Each worker loads the font metrics and layout styles once, not once per report
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_up) as executor:
+        futures = [
+            executor.submit(render_company, directory, os.path.join(output_dir, os.path.basename(directory) + ".pdf"), date)
+            for directory in directories
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            telemetry.record("report.company", record["total_seconds"], error=record.get("error"),
+                             company=record["company"], worker=record["worker"], bytes=record.get("bytes", 0))
+            status = record["output"] if record["status"] == "ok" else f"error: {record['error']}"
+            print(f"[{len(records)}/{len(futures)}] {record['company']}: {status} ({record['total_seconds']:.2f}s)")
+
+    records.sort(key=lambda record: record["source"])
+    manifest = {
+        "date": date,
+        "workers": workers,
+        "reports": len(records),
+        "failed": sum(record["status"] != "ok" for record in records),
+        "skipped": skipped,
+        "wall_seconds": round(time.perf_counter() - start, 4),
+        "records": records,
+    }
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(manifest_path, "w") as file:
+        json.dump(manifest, file, indent=4)
+    print(f"Rendered {manifest['reports'] - manifest['failed']}/{manifest['reports']} reports in "
+          f"{manifest['wall_seconds']:.1f}s; manifest saved to '{manifest_path}'")
+    return manifest
 
 
 def generate_report():
     try:
-        pdf = PDFReport()
-
-        # Cover Page
-        pdf.add_cover_page(
-            title="AI & GenAI Use Case Report",
-            subtitle="Industry Trends, Use Cases, and Resource Insights",
-            date="January 2025"
-        )
-
         # Load content from files
         with open("research_output.json", "r") as file:
             research_data = json.load(file)
@@ -71,40 +139,7 @@ def generate_report():
         with open("resources.md", "r") as file:
             resources = file.read()
 
-        # Industry Trends
-        pdf.add_page()
-        pdf.add_section_title("Industry Trends")
-        for trend in research_data.get("industry_trends", []):
-            pdf.add_bullet_point(trend)
-
-        # Competitors
-        pdf.add_section_title("Competitors")
-        for competitor in research_data.get("competitors", []):
-            pdf.add_bullet_point(competitor)
-
-        # AI Insights
-        pdf.add_section_title("AI Insights")
-        pdf.add_paragraph(research_data.get("ai_insights", ""))
-
-        # Use Cases
-        pdf.add_section_title("AI/GenAI Use Cases")
-        pdf.add_paragraph(use_cases)
-
-        # Relevant Datasets
-        pdf.add_section_title("Relevant Datasets")
-        for line in resources.split("\n"):
-            if line.startswith("-"):
-                parts = line.split(" - ")
-                if len(parts) == 2:
-                    dataset_name, url = parts
-                    pdf.add_hyperlink(dataset_name.strip(), url.strip())
-                else:
-                    pdf.add_paragraph(line.strip())
-            else:
-                pdf.add_paragraph(line.strip())
-
-        # Save PDF
-        pdf.output("GenAI_Summary_Report.pdf")
+        build_report(research_data, use_cases, resources)
         print("Report generated successfully: GenAI_Summary_Report.pdf")
 
     except Exception as e:
@@ -112,4 +147,15 @@ def generate_report():
 
 
 if __name__ == "__main__":
-    generate_report()
+    parser = argparse.ArgumentParser(description="Report Generator")
+    parser.add_argument("--batch-dir", help="Directory of per-company artifact directories to render in bulk")
+    parser.add_argument("--output-dir", default="reports", help="Directory for bulk reports and the manifest")
+    parser.add_argument("--workers", type=int, default=REPORT_WORKERS, help="Reports rendered in parallel")
+    parser.add_argument("--date", help="Date shown on the cover page (default: current month)")
+    args = parser.parse_args()
+    telemetry.start_run("report")
+
+    if args.batch_dir:
+        generate_reports(args.batch_dir, args.output_dir, args.workers, args.date)
+    else:
+        generate_report()
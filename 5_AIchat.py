@@ -1,18 +1,37 @@
 import os
 import re
-import requests
-import faiss
+import time
+import argparse
+import threading
 import numpy as np
 from tqdm import tqdm
-from sentence_transformers import SentenceTransformer
+from model_registry import get_cross_encoder, get_embedding_model, model_key, warm_up
 import logging
-import PyPDF2  # Ensure PyPDF2 is imported
+from pdf_extract import iter_pdf_pages, batched
+from retrieval import encode_queries, hybrid_search, retrieve_contexts, read_questions, write_answers_jsonl
+from bm25 import BM25Index
+from index_store import load_or_build_index
+from ann_index import INDEX_TYPE, build_index, set_search_params
+from corpus import CorpusIndex, file_sha256
+from chunking import get_chunker, strip_repeated_lines
+from streaming import TimedStream
+from semantic_cache import SemanticAnswerCache
+from generators import GENERATOR, GENERATORS, get_generator, generate_answers, stream_answer
+from context_packing import pack_context
+import telemetry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Use environment variables for secure API token storage
-HF_API_TOKEN = os.getenv("HF_API_TOKEN", "Your_Default_Token")
+# Embedding and chunking settings; changing either invalidates stored indexes
+MODEL_NAME = "all-MiniLM-L6-v2"
+CHUNKER = os.getenv("CHAT_CHUNKER", "token")  # "token", "fixed" or "sentence"; see chunking.py
+CHUNK_OVERLAP_TOKENS = 32
+EMBED_BATCH_SIZE = 64  # Chunks encoded per model call while pages stream in
+
+# Retrieval settings
+RETRIEVAL = os.getenv("CHAT_RETRIEVAL", "hybrid")  # "hybrid" (BM25 + dense) or "dense"
+RERANKER_MODEL = os.getenv("CHAT_RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
 
 # Helper Functions
 def extract_text_from_pdf(pdf_path):
@@ -23,12 +42,7 @@ def extract_text_from_pdf(pdf_path):
         logging.error(f"PDF file not found: {pdf_path}")
         return ""
     try:
-        with open(pdf_path, "rb") as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in tqdm(pdf_reader.pages, desc="Extracting pages"):
-                text += page.extract_text() or ""
-            return text
+        return "\n".join(tqdm(iter_pdf_pages(pdf_path), desc="Extracting pages"))
     except Exception as e:
         logging.error(f"Error reading PDF: {e}")
         return ""
@@ -41,20 +55,45 @@ def preprocess_text(text):
     text = re.sub(r"[^A-Za-z0-9.,;!?()'\"$%-]+", " ", text)  # Retain $, %, and -
     return text.strip()
 
-def create_embeddings_and_index(text):
+def make_chunker(model):
     """
-    Chunk text into smaller parts and create embeddings and FAISS index.
+    Build the configured chunker; token-based chunks are sized to the model's max sequence length.
+    """
+    params = {"overlap_tokens": CHUNK_OVERLAP_TOKENS} if CHUNKER == "token" else {}
+    return get_chunker(CHUNKER, model=model, clean=preprocess_text, **params)
+
+def embed_chunk_stream(model, chunk_stream):
+    """
+    Embed chunks in batches as they arrive and build the FAISS index.
+    Returns (index, chunks, embeddings).
     """
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    chunk_size = 512
-    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
-    embeddings = model.encode(chunks)
+    chunks, batches = [], []
+    for batch in batched(chunk_stream, EMBED_BATCH_SIZE):
+        chunks.extend(batch)
+        with telemetry.span("embed.chunks", items=len(batch)):
+            batches.append(np.asarray(model.encode(batch), dtype="float32"))
+    if not chunks:
+        raise ValueError("Failed to extract text.")
+    embeddings = np.vstack(batches)
 
     # Build FAISS index
-    dimension = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
-    index.add(embeddings)
+    index = build_index(embeddings, INDEX_TYPE)
 
+    return index, chunks, embeddings
+
+def embed_chunks(model, text):
+    """
+    Chunk text, embed it with `model` and build the FAISS index.
+    Returns (index, chunks, embeddings).
+    """
+    return embed_chunk_stream(model, make_chunker(model).iter_chunks([text]))
+
+def create_embeddings_and_index(text):
+    """
+    Chunk text into smaller parts and create embeddings and FAISS index.
+    """
+    model = get_embedding_model(MODEL_NAME)
+    index, chunks, _ = embed_chunks(model, text)
     return index, chunks, model
 
 def retrieve_context(index, model, chunks, query, top_k=1):
@@ -62,75 +101,194 @@ def retrieve_context(index, model, chunks, query, top_k=1):
     Retrieve the most relevant context from the FAISS index.
     """
     try:
-        query_embedding = model.encode([query])
-        distances, indices = index.search(np.array(query_embedding, dtype="float32"), top_k)
-        context = " ".join([chunks[i] for i in indices[0]])
+        results = retrieve_contexts(index, model, chunks, [query], top_k=top_k)[0]
+        context = " ".join([result["text"] for result in results])
         return context
     except Exception as e:
         logging.error(f"Error during context retrieval: {e}")
         return ""
 
-def generate_answer_with_hf_api(context, question):
+def build_chat_index(pdf_path):
     """
-    Generate an answer using Hugging Face Inference API.
+    Extract, preprocess and index a PDF. Returns (index, chunks, model), or None on failure.
+    The index is persisted and reused for later sessions on the same PDF.
     """
-    headers = {
-        "Authorization": f"Bearer {HF_API_TOKEN}"
-    }
-    payload = {
-        "inputs": f"Context: {context}\n\nQuestion: {question}\nAnswer:",
-        "parameters": {"max_length": 300, "temperature": 0.6},
-    }
+    if not os.path.exists(pdf_path):
+        logging.error(f"PDF file not found: {pdf_path}")
+        return None
+    with open(pdf_path, "rb") as file:
+        pdf_bytes = file.read()
+
+    model = get_embedding_model(MODEL_NAME)
+    chunker = make_chunker(model)
+
+    def build():
+        # Pages are cleaned, chunked and embedded while later pages are still being extracted
+        logging.info("\nLoading PDF content and building embeddings...")
+        pages = strip_repeated_lines(tqdm(iter_pdf_pages(pdf_bytes), desc="Extracting pages"))
+        return embed_chunk_stream(model, chunker.iter_chunks(pages))
+
     try:
-        response = requests.post(
-            "https://api-inference.huggingface.co/models/google/flan-t5-large",
-            headers=headers,
-            json=payload
-        )
-        if response.status_code == 200:
-            return response.json()[0]["generated_text"]
-        else:
-            logging.error(f"API Error: {response.status_code}, {response.text}")
-            return f"Error: {response.status_code}, {response.text}"
+        chunk_params = dict(chunker.params(), extraction="pages", headers="stripped", index=INDEX_TYPE)
+        index, chunks, _ = load_or_build_index(pdf_bytes, model_key(MODEL_NAME), chunk_params, build)
+    except ValueError as e:
+        logging.error(f"{e} Exiting.")
+        return None
     except Exception as e:
-        logging.error(f"Error during API call: {e}")
-        return ""
+        logging.error(f"Error reading PDF: {e}")
+        return None
+    return set_search_params(index), chunks, model
+
+def build_corpus_index(pdf_dir):
+    """
+    Sync the persistent multi-document index with the PDFs in `pdf_dir`.
+    Only new or changed PDFs are extracted and embedded.
+    """
+    model = get_embedding_model(MODEL_NAME)
+    chunker = make_chunker(model)
+    corpus = CorpusIndex(
+        model,
+        model_key(MODEL_NAME),
+        extract=lambda path: iter_pdf_pages(path),
+        chunk=lambda pages: list(chunker.iter_chunks(strip_repeated_lines(pages))),
+        chunk_params=chunker.params(),
+    )
+    summary = corpus.sync(pdf_dir)
+    logging.info(
+        f"Corpus synced: {len(summary['added'])} added, {len(summary['updated'])} updated, "
+        f"{len(summary['removed'])} removed, {len(summary['unchanged'])} unchanged"
+    )
+    return corpus
+
+def answer_questions_batch(search, questions_path, output_path, retrieve_only=False, generator=None):
+    """
+    Answer every question in `questions_path` (one per line) and write the results as JSONL.
+    `search(questions)` retrieves context for all questions at once (one encode call, one FAISS search),
+    and `generator` answers them in batches from context packed into its input budget.
+    """
+    questions = read_questions(questions_path)
+    logging.info(f"Retrieving context for {len(questions)} questions...")
+    all_results = search(questions)
+    records = [{"question": question, "contexts": results} for question, results in zip(questions, all_results)]
+
+    if not retrieve_only:
+        logging.info(f"Answering {len(questions)} questions with the {generator.name} generator...")
+        contexts = []
+        for record in records:
+            context, usage = pack_context(record["contexts"], record["question"], generator)
+            record["context_tokens"] = usage["tokens"]
+            contexts.append(context)
+        try:
+            answers = generate_answers(generator, contexts, questions)
+        except Exception as e:
+            logging.error(f"Error generating answers: {e}")
+            answers = [f"Error: {e}" if context else "" for context in contexts]
+        for record, answer in zip(records, answers):
+            record["answer"] = answer
+
+    write_answers_jsonl(output_path, records)
+    logging.info(f"Answers saved to '{output_path}'")
 
 # Main Function
 def main():
+    parser = argparse.ArgumentParser(description="AI-Powered PDF Chatbot")
+    parser.add_argument("--pdf", help="Path to the PDF file")
+    parser.add_argument("--corpus", help="Directory of PDFs to index and query together")
+    parser.add_argument("--questions", help="File with one question per line to answer in batch")
+    parser.add_argument("--output", default="answers.jsonl", help="JSONL file for batch answers")
+    parser.add_argument("--top-k", type=int, default=3, help="Chunks retrieved per question, packed into the prompt as they fit")
+    parser.add_argument("--retrieve-only", action="store_true", help="Skip answer generation in batch mode")
+    parser.add_argument("--generator", default=GENERATOR, choices=sorted(GENERATORS), help="Answer generation backend")
+    parser.add_argument("--retrieval", default=RETRIEVAL, choices=["hybrid", "dense"], help="Retrieval strategy")
+    parser.add_argument("--rerank", action="store_true", help="Rerank hybrid results with a cross-encoder")
+    args = parser.parse_args()
+    telemetry.start_run("chat")
+
     logging.info("=== AI-Powered PDF Chatbot ===")
 
-    # Step 1: Get PDF path from user
-    pdf_path = input("Enter the path to the PDF file: ").strip()
+    # Load the embedding model in the background while the user enters the PDF path
+    threading.Thread(target=warm_up, args=(MODEL_NAME,), daemon=True).start()
 
-    # Step 2: Extract and preprocess text
-    logging.info("\nLoading PDF content...")
-    raw_text = extract_text_from_pdf(pdf_path)
-    if not raw_text:
-        logging.error("Failed to extract text. Exiting.")
-        return
-    preprocessed_text = preprocess_text(raw_text)
+    if args.corpus:
+        # Steps 1-3: Sync the multi-document index with the PDF directory
+        corpus = build_corpus_index(args.corpus)
+        model = corpus.model
+        document_hash = corpus.content_hash()
+        lexical_index = corpus.lexical_index()
 
-    # Step 3: Create embeddings and FAISS index
-    logging.info("\nBuilding embeddings and FAISS index...")
-    faiss_index, chunks, model = create_embeddings_and_index(preprocessed_text)
+        def dense_search(questions, top_k, query_embeddings=None):
+            return corpus.search(questions, top_k=top_k, query_embeddings=query_embeddings)
+    else:
+        # Step 1: Get PDF path from user
+        pdf_path = args.pdf or input("Enter the path to the PDF file: ").strip()
+
+        # Steps 2-3: Extract text, create embeddings and FAISS index
+        built = build_chat_index(pdf_path)
+        if built is None:
+            return
+        faiss_index, chunks, model = built
+        document_hash = file_sha256(pdf_path)
+        lexical_index = BM25Index({"chunk_id": i, "text": chunk} for i, chunk in enumerate(chunks))
+
+        def dense_search(questions, top_k, query_embeddings=None):
+            return retrieve_contexts(faiss_index, model, chunks, questions, top_k=top_k, query_embeddings=query_embeddings)
+
+    reranker = get_cross_encoder(RERANKER_MODEL) if args.rerank else None
+
+    def search(questions, query_embeddings=None):
+        if args.retrieval == "dense":
+            return dense_search(questions, args.top_k, query_embeddings)
+        return hybrid_search(dense_search, lexical_index, questions, args.top_k, reranker, query_embeddings)
+
+    generator = None if args.questions and args.retrieve_only else get_generator(args.generator)
+
+    if args.questions:
+        answer_questions_batch(search, args.questions, args.output, args.retrieve_only, generator)
+        return
 
     # Step 4: Chat system
+    # Repeated and near-identical questions about the same document reuse earlier answers
+    answer_cache = SemanticAnswerCache()
+    cache_scope = (document_hash, generator.name, args.top_k, args.retrieval, args.rerank)
     logging.info("\nSystem is ready! Ask questions about the report (type 'exit' to quit):")
     while True:
         question = input("\nYour Question: ").strip()
         if question.lower() in ["exit", "quit", "bye"]:
+            logging.info(f"Answer cache: {answer_cache.stats()}")
             logging.info("Exiting. Thank you!")
             break
 
+        start = time.perf_counter()
+        cached, embedding = answer_cache.get(cache_scope, question, lambda text: encode_queries(model, [text])[0])
+        if cached is not None:
+            print(f"\nAnswer: {cached}")
+            logging.info(f"Answer served from cache in {1000 * (time.perf_counter() - start):.1f} ms")
+            continue
+
         # Retrieve context and generate answer
-        context = retrieve_context(faiss_index, model, chunks, question)
+        try:
+            context, usage = pack_context(search([question], embedding[None, :])[0], question, generator)
+        except Exception as e:
+            logging.error(f"Error during context retrieval: {e}")
+            context = ""
         if not context:
             logging.warning("No relevant context found. Try rephrasing your question.")
             continue
+        logging.info(f"Context: {usage['tokens']}/{usage['budget']} tokens from {usage['chunks']} chunks ({usage['dropped']} did not fit)")
 
-        answer = generate_answer_with_hf_api(context, question)
-        print(f"\nAnswer: {answer}")
+        # Print the answer as it is generated
+        answer = TimedStream(stream_answer(generator, context, question))
+        print("\nAnswer: ", end="", flush=True)
+        try:
+            for piece in answer:
+                print(piece, end="", flush=True)
+        except Exception as e:
+            logging.error(f"Error generating answer: {e}")
+        else:
+            if answer.text.strip() and not answer.text.startswith("Error"):
+                answer_cache.put(cache_scope, question, embedding, answer.text)
+        print()
+        logging.info(f"Answer {answer.summary()}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,96 @@
+import os
+import math
+import logging
+
+import faiss
+import numpy as np
+
+# Index configuration for the chat system; see build_index for the available types
+INDEX_TYPE = os.getenv("CHAT_INDEX_TYPE", "flat")
+NPROBE = int(os.getenv("CHAT_NPROBE", "16"))  # IVF lists visited per query
+EF_SEARCH = int(os.getenv("CHAT_EF_SEARCH", "64"))  # HNSW candidate list size per query
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+MIN_POINTS_PER_CENTROID = 39  # FAISS warns below this many training points per list
+
+
+def default_nlist(num_vectors):
+    """
+    Picks the number of IVF lists for a corpus size (about 4 * sqrt(n), bounded by the training data).
+    """
+    nlist = int(4 * math.sqrt(num_vectors))
+    return max(1, min(nlist, num_vectors // MIN_POINTS_PER_CENTROID))
+
+
+def _pq_subquantizers(dimension, requested):
+    # Product quantization needs the vector dimension to split evenly into sub-vectors
+    for m in range(min(requested, dimension), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def build_index(embeddings, index_type=INDEX_TYPE, ids=None, nlist=None, hnsw_m=32, ef_construction=200, pq_m=48, pq_bits=8):
+    """
+    Builds a FAISS index over `embeddings`:
+
+    - "flat": exact brute-force search over full float32 vectors.
+    - "ivf": inverted lists around `nlist` trained centroids; tune recall with `nprobe`.
+    - "hnsw": graph index, no training; tune recall with `efSearch`.
+    - "ivfpq": IVF with product-quantized vectors (`pq_m` bytes per vector at 8 bits) for compressed storage.
+
+    Corpora too small to train the requested index fall back to "flat". When `ids` are given the
+    index is wrapped in an `IndexIDMap` so vectors are searched and removed by those ids.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    num_vectors, dimension = embeddings.shape
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    if index_type in ("ivf", "ivfpq"):
+        nlist = nlist or default_nlist(num_vectors)
+        min_points = max(nlist * MIN_POINTS_PER_CENTROID, 2 ** pq_bits if index_type == "ivfpq" else 0)
+        if num_vectors < min_points:
+            logging.info(f"{num_vectors} vectors are too few to train '{index_type}', using 'flat'")
+            index_type = "flat"
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dimension)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m)
+        index.hnsw.efConstruction = ef_construction
+    else:
+        quantizer = faiss.IndexFlatL2(dimension)
+        if index_type == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, _pq_subquantizers(dimension, pq_m), pq_bits)
+        index.train(embeddings)
+
+    if ids is not None:
+        index = faiss.IndexIDMap(index)
+        index.add_with_ids(embeddings, np.asarray(ids, dtype="int64"))
+    else:
+        index.add(embeddings)
+    set_search_params(index)
+    return index
+
+
+def set_search_params(index, nprobe=NPROBE, ef_search=EF_SEARCH):
+    """
+    Applies query-time tuning knobs to whichever index type is given; knobs that don't apply are ignored.
+    """
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = min(nprobe, base.nlist)
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = ef_search
+    return index
+
+
+def index_memory_bytes(index):
+    """
+    Returns the serialized size of an index, a close proxy for its resident memory.
+    """
+    return int(faiss.serialize_index(index).nbytes)
+
@@ -0,0 +1,102 @@
+"""
+Compares the chat system's FAISS index types against exact (flat) search.
+
+Reports build time, query latency, recall@k and index memory for each index type, using either
+a saved embeddings matrix (.npy) or random unit vectors of the embedding model's dimension.
+
+    python benchmarks/bench_ann.py --num-vectors 200000 --types flat ivf hnsw ivfpq
+    python benchmarks/bench_ann.py --embeddings .cache/indexes/<key>/embeddings.npy --nprobe 8 32
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import INDEX_TYPES, build_index, set_search_params, index_memory_bytes  # noqa: E402
+
+
+def random_unit_vectors(num_vectors, dimension, seed):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((num_vectors, dimension), dtype="float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def recall_at_k(found, truth):
+    hits = sum(len(set(row_found) & set(row_truth)) for row_found, row_truth in zip(found, truth))
+    return hits / truth.size
+
+
+def time_queries(index, queries, k):
+    """
+    Runs one query at a time, the way the chat loop does, and returns (ids, per-query latencies in ms).
+    """
+    latencies = []
+    ids = []
+    for query in queries:
+        start = time.perf_counter()
+        _, row_ids = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(row_ids[0])
+    return np.array(ids), np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN index benchmark")
+    parser.add_argument("--embeddings", help="Embeddings .npy file to index (default: random vectors)")
+    parser.add_argument("--num-vectors", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=384)  # all-MiniLM-L6-v2
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[16])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[64])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.embeddings:
+        vectors = np.ascontiguousarray(np.load(args.embeddings), dtype="float32")
+    else:
+        vectors = random_unit_vectors(args.num_vectors, args.dimension, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    queries = vectors[rng.choice(len(vectors), size=min(args.num_queries, len(vectors)), replace=False)]
+    queries = queries + rng.normal(scale=0.01, size=queries.shape).astype("float32")
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}\n")
+    header = f"{'index':<8} {'params':<14} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9} {'memory MB':>10}"
+    print(header)
+    print("-" * len(header))
+
+    truth = None
+    for index_type in ["flat"] + [t for t in args.types if t != "flat"]:
+        start = time.perf_counter()
+        index = build_index(vectors, index_type)
+        build_seconds = time.perf_counter() - start
+        memory_mb = index_memory_bytes(index) / 1e6
+
+        if index_type in ("ivf", "ivfpq"):
+            settings = [("nprobe", value, {"nprobe": value}) for value in args.nprobe]
+        elif index_type == "hnsw":
+            settings = [("efSearch", value, {"ef_search": value}) for value in args.ef_search]
+        else:
+            settings = [("", "", {})]
+
+        for name, value, params in settings:
+            set_search_params(index, **params)
+            ids, latencies = time_queries(index, queries, args.k)
+            if truth is None:
+                truth = ids  # Flat is built first and is exact
+            if index_type == "flat" and index_type not in args.types:
+                continue
+            print(
+                f"{index_type:<8} {f'{name}={value}' if name else '-':<14} {build_seconds:>8.2f} "
+                f"{np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 95):>8.3f} "
+                f"{recall_at_k(ids, truth):>9.3f} {memory_mb:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
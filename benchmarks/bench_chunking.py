@@ -0,0 +1,80 @@
+"""
+Compares chunking strategies for the chat system on one PDF and a labeled question set.
+
+For each chunker it reports the chunk count, average chunk length, embedding time and the retrieval
+hit rate: the share of questions whose expected answer text appears in one of the top-k chunks.
+The question set is JSONL with one {"question": ..., "answer": ...} object per line.
+
+    python benchmarks/bench_chunking.py --pdf GenAI_Summary_Report.pdf --labels faq_labels.jsonl --k 3
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import build_index  # noqa: E402
+from chunking import get_chunker, strip_repeated_lines  # noqa: E402
+from pdf_extract import iter_pdf_pages  # noqa: E402
+from retrieval import retrieve_contexts  # noqa: E402
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9$%.]+", " ", text.lower())).strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunking benchmark")
+    parser.add_argument("--pdf", required=True)
+    parser.add_argument("--labels", required=True, help="JSONL file of {question, answer} records")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--overlap", type=int, nargs="+", default=[0, 32, 64], help="Token overlaps to try")
+    args = parser.parse_args()
+
+    with open(args.labels, "r", encoding="utf-8") as file:
+        labels = [json.loads(line) for line in file if line.strip()]
+    questions = [label["question"] for label in labels]
+    answers = [normalize(label["answer"]) for label in labels]
+
+    model = SentenceTransformer(args.model)
+    pages = list(iter_pdf_pages(args.pdf))
+    configs = [("fixed", {}, False), ("sentence", {}, False)]
+    configs += [("token", {"overlap_tokens": overlap}, True) for overlap in args.overlap]
+
+    header = f"{'chunker':<26} {'chunks':>7} {'avg chars':>10} {'embed s':>8} {'hit@k':>7}"
+    print(f"{len(pages)} pages, {len(questions)} questions, k={args.k}\n")
+    print(header)
+    print("-" * len(header))
+
+    for name, params, strip_headers in configs:
+        chunker = get_chunker(name, model=model, **params)
+        source = strip_repeated_lines(pages) if strip_headers else pages
+        chunks = list(chunker.iter_chunks(source))
+
+        start = time.perf_counter()
+        embeddings = np.asarray(model.encode(chunks, batch_size=64), dtype="float32")
+        embed_seconds = time.perf_counter() - start
+
+        index = build_index(embeddings, "flat")
+        results = retrieve_contexts(index, model, chunks, questions, top_k=args.k)
+        hits = sum(
+            any(answer in normalize(result["text"]) for result in row)
+            for answer, row in zip(answers, results)
+        )
+
+        label = name + "".join(f" {key}={value}" for key, value in params.items())
+        print(
+            f"{label:<26} {len(chunks):>7} {np.mean([len(chunk) for chunk in chunks]):>10.0f} "
+            f"{embed_seconds:>8.2f} {hits / max(len(questions), 1):>7.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
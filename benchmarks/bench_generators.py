@@ -0,0 +1,74 @@
+"""
+Compares answer generators for the chat system on a fixed set of questions and contexts.
+
+For each generator it reports load time, time to first token and full latency per question
+(one at a time, the way the chat loop answers), and batched throughput (the way --questions does).
+The question set is JSONL with one {"question": ..., "context": ...} object per line, for example the
+"question" and joined "contexts" of an answers.jsonl written with --retrieve-only.
+
+    python benchmarks/bench_generators.py --questions contexts.jsonl --generators stub local
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generators import GENERATORS, get_generator, generate_answers, stream_answer  # noqa: E402
+from streaming import TimedStream  # noqa: E402
+
+
+def read_records(path):
+    with open(path, "r", encoding="utf-8") as file:
+        records = [json.loads(line) for line in file if line.strip()]
+    for record in records:
+        if "context" not in record:
+            record["context"] = " ".join(result["text"] for result in record.get("contexts", []))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer generator benchmark")
+    parser.add_argument("--questions", required=True, help="JSONL file of {question, context} records")
+    parser.add_argument("--generators", nargs="+", default=["stub", "local"], choices=sorted(GENERATORS))
+    parser.add_argument("--limit", type=int, default=20, help="Questions answered one at a time per generator")
+    args = parser.parse_args()
+
+    records = read_records(args.questions)
+    questions = [record["question"] for record in records]
+    contexts = [record["context"] for record in records]
+
+    header = f"{'generator':<10} {'load s':>7} {'ttft p50':>9} {'p50 s':>7} {'p95 s':>7} {'batch q/s':>10}"
+    print(f"{len(records)} questions, {min(args.limit, len(records))} answered one at a time\n")
+    print(header)
+    print("-" * len(header))
+
+    for name in args.generators:
+        start = time.perf_counter()
+        generator = get_generator(name)
+        load_seconds = time.perf_counter() - start
+
+        ttfts, latencies = [], []
+        for question, context in list(zip(questions, contexts))[:args.limit]:
+            stream = TimedStream(stream_answer(generator, context, question))
+            for _ in stream:
+                pass
+            ttfts.append(stream.ttft if stream.ttft is not None else stream.elapsed)
+            latencies.append(stream.elapsed)
+
+        start = time.perf_counter()
+        generate_answers(generator, contexts, questions)
+        throughput = len(questions) / (time.perf_counter() - start)
+
+        print(
+            f"{name:<10} {load_seconds:>7.2f} {np.percentile(ttfts, 50):>9.3f} {np.percentile(latencies, 50):>7.3f} "
+            f"{np.percentile(latencies, 95):>7.3f} {throughput:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""
+Offline benchmark suite for the whole system, runnable without network access or API keys.
+
+- pipeline: runs research -> use cases -> assets -> report for 1, 10 and 100 companies against the local
+  stand-in server (stand_in_server.py), which replays recorded provider responses with injected latency and errors.
+- chat: extracts, chunks, embeds and indexes synthetic 10, 100 and 1,000 page PDFs, then answers labeled
+  questions one at a time with hybrid retrieval, checking that each answer's text is retrieved.
+
+Each scenario and scale runs in a fresh process, so peak RSS is measured per run. Results (throughput,
+p50/p95 latency, peak RSS, errors) are printed and can be saved as JSON and compared with a previous run;
+the suite exits with status 1 when a metric regresses by more than --tolerance, for use in CI.
+
+    python benchmarks/bench_offline.py --output bench_results.json
+    python benchmarks/bench_offline.py --compare bench_results.json --tolerance 0.25
+
+The chat scenario embeds with a hashing stand-in by default; pass --model all-MiniLM-L6-v2 to use the
+real model if it is available locally.
+"""
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import datetime
+import resource
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from stand_in_server import FIXTURES_PATH, environment, start_server  # noqa: E402
+
+INDUSTRIES = ["Automotive", "Retail", "Healthcare", "Finance", "Manufacturing", "Energy", "Logistics", "Telecom"]
+SEGMENTS = ["cloud", "hardware", "services", "licensing", "advertising", "subscriptions", "consulting", "logistics"]
+QUESTIONS_PER_RUN = 200
+# Metrics compared with a baseline, and whether higher values are better
+COMPARED = {"throughput": True, "p50_ms": False, "p95_ms": False, "peak_rss_mb": False}
+# Failure counts; any increase over the baseline is a regression
+COUNTED = ("errors", "degraded")
+
+
+class HashingEmbedder:
+    """
+    Offline stand-in for the sentence-transformers model: L2-normalized feature hashing of the BM25 terms
+    and their bigrams. Deterministic and dependency-free, so the retrieval path can be timed anywhere.
+    """
+
+    max_seq_length = 256
+    tokenizer = None
+
+    def __init__(self, dimension=384):
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, texts, batch_size=64, convert_to_numpy=True, **kwargs):
+        from bm25 import tokenize
+
+        matrix = np.zeros((len(texts), self.dimension), dtype="float32")
+        for row, text in enumerate(texts):
+            terms = tokenize(text)
+            for term in terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]:
+                matrix[row, zlib.crc32(term.encode("utf-8")) % self.dimension] += 1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+
+def percentiles(latencies):
+    if not latencies:
+        return 0.0, 0.0
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process and of its largest child (e.g. PDF extraction workers), in MB.
+    """
+    # ru_maxrss is in kilobytes on Linux
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    )
+
+
+def make_pdf(path, pages, seed=0):
+    """
+    Writes a synthetic report of `pages` body pages in which every paragraph states one fact, and returns
+    the facts as {"question", "answer"} records.
+    """
+    from report_render import Block, PDFReport, SpilledPages
+
+    rng = random.Random(seed)
+    filler = [
+        "Management expects demand to remain steady over the next planning cycle.",
+        "The company continued to invest in automation and data infrastructure.",
+        "Operating costs were affected by supplier pricing and logistics delays.",
+        "Customer retention improved after the launch of new support channels.",
+        "The board approved additional spending on research and development.",
+    ]
+    pdf = PDFReport()
+    pdf.pages = SpilledPages()
+    pdf.add_page()
+    facts = []
+    while pdf.page_no() <= pages:
+        company = f"Company {len(facts) + 1}"
+        segment, year, amount = rng.choice(SEGMENTS), rng.randint(2015, 2024), rng.randint(10, 9999)
+        fact = f"In {year}, {company} reported revenue of ${amount} million from its {segment} business."
+        text = " ".join(rng.sample(filler, 2) + [fact] + rng.sample(filler, 2))
+        pdf.render_blocks([Block("heading", f"{company} annual summary"), Block("paragraph", text)])
+        facts.append({
+            "question": f"What revenue did {company} report from its {segment} business in {year}?",
+            "answer": f"${amount} million",
+        })
+    pdf.output_streaming(path)
+    return facts
+
+
+def run_pipeline_scale(companies, concurrency, workdir):
+    import pipeline
+    import telemetry
+
+    pairs = [(INDUSTRIES[i % len(INDUSTRIES)], f"Company {i + 1}") for i in range(companies)]
+
+    def run(pair):
+        start = time.perf_counter()
+        try:
+            result = pipeline.run_pipeline(*pair, output_dir=os.path.join(workdir, "runs"), incremental=False)
+            research = result.research
+            complete = all(pipeline.succeeded(value) for value in (
+                research.industry_trends, research.competitors, research.ai_insights, research.company_details
+            ))
+            return time.perf_counter() - start, "ok" if complete else "degraded"
+        except Exception:
+            return time.perf_counter() - start, "failed"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(run, pairs))
+    wall = time.perf_counter() - start
+
+    latencies = [1000 * seconds for seconds, _ in outcomes]
+    p50, p95 = percentiles(latencies)
+    spans = {
+        name: {
+            "count": stats.count,
+            "seconds": round(stats.seconds, 3),
+            "p95_ms": round(1000 * stats.percentile(0.95), 1),
+            "cache_hits": stats.cache_hits,
+        }
+        for name, stats in telemetry.metrics.snapshot()
+    }
+    return {
+        "wall_seconds": wall,
+        "throughput": 60 * companies / wall,
+        "throughput_unit": "companies/min",
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "errors": sum(status == "failed" for _, status in outcomes),
+        "degraded": sum(status == "degraded" for _, status in outcomes),
+        "spans": spans,
+    }
+
+
+def run_chat_scale(pages, pdf_path, model_name):
+    from ann_index import INDEX_TYPE, build_index
+    from bm25 import BM25Index
+    from chunking import get_chunker, strip_repeated_lines
+    from model_registry import get_embedding_model
+    from pdf_extract import iter_pdf_pages
+    from retrieval import hybrid_search, retrieve_contexts
+
+    with open(pdf_path + ".facts.json", "r", encoding="utf-8") as file:
+        facts = json.load(file)
+    facts = random.Random(0).sample(facts, min(QUESTIONS_PER_RUN, len(facts)))
+    model = HashingEmbedder() if model_name == "hash" else get_embedding_model(model_name)
+
+    start = time.perf_counter()
+    chunks = list(get_chunker("token", model=model).iter_chunks(strip_repeated_lines(iter_pdf_pages(pdf_path))))
+    extracted = time.perf_counter()
+    embeddings = np.asarray(model.encode(chunks, batch_size=64), dtype="float32")
+    index = build_index(embeddings, INDEX_TYPE)
+    lexical_index = BM25Index({"chunk_id": i, "text": chunk} for i, chunk in enumerate(chunks))
+    indexed = time.perf_counter()
+
+    def dense_search(queries, top_k, query_embeddings=None):
+        return retrieve_contexts(index, model, chunks, queries, top_k=top_k, query_embeddings=query_embeddings)
+
+    latencies, hits = [], 0
+    for fact in facts:
+        query_start = time.perf_counter()
+        results = hybrid_search(dense_search, lexical_index, [fact["question"]], top_k=3)[0]
+        latencies.append(1000 * (time.perf_counter() - query_start))
+        hits += any(fact["answer"] in re.sub(r"\s+", " ", result["text"]) for result in results)
+    queried = time.perf_counter()
+
+    p50, p95 = percentiles(latencies)
+    return {
+        "wall_seconds": queried - start,
+        "ingest_seconds": extracted - start,
+        "index_seconds": indexed - extracted,
+        "chunks": len(chunks),
+        "throughput": len(facts) / (queried - indexed),
+        "throughput_unit": "queries/s",
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "hit_rate": hits / max(len(facts), 1),
+        "errors": 0,
+    }
+
+
+def run_child(args):
+    """
+    Runs one scenario at one scale in this process and prints its result as the last line of output.
+    """
+    if args.child == "pipeline":
+        result = run_pipeline_scale(args.scale, args.concurrency, args.workdir)
+    else:
+        result = run_chat_scale(args.scale, args.pdf, args.model)
+    result["peak_rss_mb"], result["children_peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(result))
+
+
+def run_scale(scenario, scale, args, env, pdf_path=None):
+    workdir = os.path.join(args.workdir, f"{scenario}_{scale}")
+    os.makedirs(workdir, exist_ok=True)
+    env = dict(env, RESPONSE_CACHE_PATH=os.path.join(workdir, "responses.sqlite3"), TRACE_FILE=os.path.join(workdir, "trace.jsonl"))
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", scenario, "--scale", str(scale),
+        "--workdir", workdir, "--concurrency", str(args.concurrency), "--model", args.model,
+    ]
+    if pdf_path:
+        command += ["--pdf", pdf_path]
+    completed = subprocess.run(command, env=env, cwd=workdir, capture_output=True, text=True)
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        error = (completed.stderr.strip().splitlines() or ["no output"])[-1]
+        return {"scenario": scenario, "scale": scale, "error": error}
+    return dict(json.loads(lines[-1]), scenario=scenario, scale=scale)
+
+
+def print_results(results):
+    header = (f"{'scenario':<9} {'scale':>6} {'wall s':>8} {'throughput':>11} {'unit':<14} {'p50 ms':>9} "
+              f"{'p95 ms':>9} {'peak MB':>8} {'errors':>6}  notes")
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        if "error" in result:
+            print(f"{result['scenario']:<9} {result['scale']:>6}  failed: {result['error']}")
+            continue
+        if result["scenario"] == "pipeline":
+            slowest = sorted(
+                ((name, span) for name, span in result["spans"].items() if not name.startswith(("stage.", "http."))),
+                key=lambda item: item[1]["seconds"], reverse=True,
+            )[:3]
+            notes = f"degraded {result['degraded']}; slowest: " + ", ".join(f"{name} {span['seconds']:.1f}s" for name, span in slowest)
+        else:
+            notes = f"{result['chunks']} chunks, ingest {result['ingest_seconds']:.1f}s, index {result['index_seconds']:.1f}s, hit@3 {result['hit_rate']:.0%}"
+        print(
+            f"{result['scenario']:<9} {result['scale']:>6} {result['wall_seconds']:>8.1f} {result['throughput']:>11.2f} "
+            f"{result['throughput_unit']:<14} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+            f"{max(result['peak_rss_mb'], result['children_peak_rss_mb']):>8.0f} {result['errors']:>6}  {notes}"
+        )
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Prints the change of each compared metric against a previous results file and returns the regressions.
+    Scales that failed outright are reported by `main`.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {(result["scenario"], result["scale"]): result for result in json.load(file)["results"]}
+    regressions = []
+    print(f"\nCompared with {baseline_path} (tolerance {tolerance:.0%}):")
+    for result in results:
+        previous = baseline.get((result["scenario"], result["scale"]))
+        if previous is None or "error" in result:
+            continue
+        if "error" in previous:
+            print(f"  {result['scenario']:<9} {result['scale']:>6}  failed in the baseline")
+            continue
+        changes = []
+        for metric in COUNTED:
+            if metric in result and result[metric] > previous.get(metric, 0):
+                regressions.append(f"{result['scenario']} {result['scale']} {metric}")
+                changes.append(f"{metric} {previous.get(metric, 0)} -> {result[metric]} REGRESSION")
+        for metric, higher_is_better in COMPARED.items():
+            change = (result[metric] - previous[metric]) / previous[metric] if previous[metric] else 0.0
+            worse = -change if higher_is_better else change
+            flag = " REGRESSION" if worse > tolerance else ""
+            if flag:
+                regressions.append(f"{result['scenario']} {result['scale']} {metric}")
+            changes.append(f"{metric} {change:+.0%}{flag}")
+        print(f"  {result['scenario']:<9} {result['scale']:>6}  " + ", ".join(changes))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("--scenarios", nargs="+", default=["pipeline", "chat"], choices=["pipeline", "chat"])
+    parser.add_argument("--companies", type=int, nargs="+", default=[1, 10, 100], help="Pipeline scales")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000], help="Chat PDF sizes")
+    parser.add_argument("--concurrency", type=int, default=4, help="Companies processed at once")
+    parser.add_argument("--fixtures", default=FIXTURES_PATH, help="Recorded provider responses")
+    parser.add_argument("--latency-scale", type=float, default=0.1, help="Multiplier for typical provider latencies")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of provider requests failed with a 503")
+    parser.add_argument("--model", default="hash", help="Embedding model for the chat scenario, or 'hash'")
+    parser.add_argument("--workdir", help="Directory for PDFs, caches and traces (default: a temporary directory)")
+    parser.add_argument("--output", help="Save results as JSON")
+    parser.add_argument("--compare", help="Results JSON of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression per metric")
+    parser.add_argument("--child", choices=["pipeline", "chat"], help=argparse.SUPPRESS)
+    parser.add_argument("--scale", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--pdf", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    temporary = None
+    if not args.workdir:
+        temporary = tempfile.TemporaryDirectory()
+        args.workdir = temporary.name
+    args.workdir = os.path.abspath(args.workdir)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.getenv("PYTHONPATH")])))
+    results = []
+
+    if "pipeline" in args.scenarios:
+        server, url = start_server(args.fixtures, latency_scale=args.latency_scale, error_rate=args.error_rate)
+        for companies in args.companies:
+            print(f"Running pipeline for {companies} companies...")
+            results.append(run_scale("pipeline", companies, args, dict(env, **environment(url))))
+        print(f"Stand-in server: {server.stats()}")
+        server.shutdown()
+
+    if "chat" in args.scenarios:
+        for pages in args.pages:
+            pdf_path = os.path.join(args.workdir, f"synthetic_{pages}.pdf")
+            if not os.path.exists(pdf_path + ".facts.json"):
+                print(f"Writing a {pages} page PDF...")
+                facts = make_pdf(pdf_path, pages)
+                with open(pdf_path + ".facts.json", "w", encoding="utf-8") as file:
+                    json.dump(facts, file)
+            print(f"Running chat retrieval on {pages} pages...")
+            results.append(run_scale("chat", pages, args, env, pdf_path))
+
+    print()
+    print_results(results)
+    regressions = compare(results, args.compare, args.tolerance) if args.compare else []
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({
+                "commit": git_commit(),
+                "created": datetime.datetime.now().isoformat(timespec="seconds"),
+                "settings": {
+                    "concurrency": args.concurrency, "latency_scale": args.latency_scale,
+                    "error_rate": args.error_rate, "model": args.model, "fixtures": args.fixtures,
+                },
+                "results": results,
+            }, file, indent=2)
+        print(f"\nResults saved to '{args.output}'")
+    if temporary is not None:
+        temporary.cleanup()
+    # A scale that crashed fails the suite whether or not there is a baseline
+    failed = [f"{result['scenario']} {result['scale']} failed" for result in results if "error" in result]
+    if failed or regressions:
+        print(f"\nRegressions: {', '.join(failed + regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
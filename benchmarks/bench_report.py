@@ -0,0 +1,117 @@
+"""
+Measures PDF report render time, file size and peak memory as reports grow.
+
+Synthetic reports are generated with an increasing number of use cases and datasets. Each size is
+rendered with the block renderer (pages spilled to disk) and, with --baseline, with the previous
+approach: Markdown rendered line by line on a plain FPDF document held in memory.
+
+    python benchmarks/bench_report.py --scales 1 10 50 100 --baseline
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fpdf import FPDF  # noqa: E402
+from report_render import latin1, render_report, report_blocks  # noqa: E402
+
+
+def synthetic_report(scale):
+    research_data = {
+        "industry_trends": [f"Trend {i}: autonomous logistics adoption - https://example.com/t/{i}" for i in range(5)],
+        "competitors": [f"Competitor {i} - https://example.com/c/{i}" for i in range(5)],
+        "ai_insights": " ".join(["Manufacturers are applying predictive models to reduce downtime and scrap."] * 20 * scale),
+    }
+    use_cases = "# Generated Use Cases\n\n" + "\n\n".join(
+        f"### Use Case {i}: Predictive maintenance for line {i}\n"
+        f"**Problem**: Unplanned downtime on production line {i} costs hours of output every week.\n"
+        f"**Solution**: Train anomaly detection models on sensor data to schedule maintenance early.\n"
+        f"**Impact**: Fewer stoppages and lower maintenance cost.\n"
+        f"**Differentiation**: Faster delivery than competitors relying on fixed schedules."
+        for i in range(1, 5 * scale + 1)
+    )
+    resources = "# Resource Links\n\n" + "".join(
+        f"## Use Case {i}: Predictive maintenance for line {i}\n### Relevant Datasets:\n"
+        + "".join(f"- Sensor dataset {i}.{j} - https://www.kaggle.com/datasets/example/{i}-{j}\n" for j in range(20))
+        + "\n"
+        for i in range(1, 5 * scale + 1)
+    )
+    return research_data, use_cases, resources
+
+
+def baseline_render(research_data, use_cases, resources, path):
+    pdf = FPDF()
+    pdf.add_page()
+    for trend in research_data["industry_trends"] + research_data["competitors"]:
+        pdf.set_font("Arial", "", 12)
+        pdf.cell(10)
+        pdf.cell(0, 10, latin1(f"- {trend}"), ln=True)
+    pdf.set_font("Arial", "", 12)
+    pdf.multi_cell(0, 10, latin1(research_data["ai_insights"]))
+    pdf.multi_cell(0, 10, latin1(use_cases))
+    for line in resources.split("\n"):
+        parts = line.split(" - ")
+        if line.startswith("-") and len(parts) == 2:
+            pdf.set_font("Arial", "U", 12)
+            pdf.set_text_color(0, 0, 255)
+            pdf.cell(0, 10, latin1(parts[0].strip()), link=parts[1].strip(), ln=True)
+            pdf.set_text_color(0, 0, 0)
+        else:
+            pdf.set_font("Arial", "", 12)
+            pdf.multi_cell(0, 10, latin1(line.strip()))
+            pdf.ln()
+    pdf.output(path)
+    return pdf.page_no()
+
+
+def measure(render):
+    """
+    Times one render, then repeats it under tracemalloc (which slows it down) for the peak memory.
+    """
+    start = time.perf_counter()
+    pages = render()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    render()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return pages, seconds, peak
+
+
+def count_pages(path):
+    with open(path, "rb") as file:
+        return file.read().count(b"/Type /Page\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report renderer benchmark")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50, 100], help="Report sizes (x5 use cases)")
+    parser.add_argument("--baseline", action="store_true", help="Also render with the previous line-by-line approach")
+    args = parser.parse_args()
+
+    header = f"{'renderer':<9} {'scale':>5} {'pages':>6} {'render s':>9} {'ms/page':>8} {'size KB':>8} {'KB/page':>8} {'peak MB':>8}"
+    print(header)
+    print("-" * len(header))
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in args.scales:
+            research_data, use_cases, resources = synthetic_report(scale)
+            runs = {"blocks": lambda path: count_pages(render_report(
+                report_blocks(research_data, use_cases, resources), path, "January 2025"))}
+            if args.baseline:
+                runs["baseline"] = lambda path: baseline_render(research_data, use_cases, resources, path)
+            for name, render in runs.items():
+                path = os.path.join(directory, f"{name}_{scale}.pdf")
+                pages, seconds, peak = measure(lambda: render(path))
+                size_kb = os.path.getsize(path) / 1024
+                print(
+                    f"{name:<9} {scale:>5} {pages:>6} {seconds:>9.2f} {1000 * seconds / pages:>8.1f} "
+                    f"{size_kb:>8.0f} {size_kb / pages:>8.1f} {peak / 2 ** 20:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
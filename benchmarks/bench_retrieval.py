@@ -0,0 +1,92 @@
+"""
+Compares dense, BM25 and hybrid retrieval for the chat system on one PDF and a labeled question set.
+
+For each retriever it reports hit@k (the share of questions whose expected answer text appears in one of
+the top-k chunks), mean reciprocal rank of the first such chunk, and per-query latency, with queries
+run one at a time the way the chat loop does. The question set is JSONL with one
+{"question": ..., "answer": ...} object per line.
+
+    python benchmarks/bench_retrieval.py --pdf GenAI_Summary_Report.pdf --labels faq_labels.jsonl --k 3 --rerank
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import build_index  # noqa: E402
+from bm25 import BM25Index  # noqa: E402
+from chunking import get_chunker, strip_repeated_lines  # noqa: E402
+from model_registry import get_cross_encoder, get_embedding_model  # noqa: E402
+from pdf_extract import iter_pdf_pages  # noqa: E402
+from retrieval import hybrid_search, retrieve_contexts  # noqa: E402
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9$%.]+", " ", text.lower())).strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval benchmark")
+    parser.add_argument("--pdf", required=True)
+    parser.add_argument("--labels", required=True, help="JSONL file of {question, answer} records")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--rerank", action="store_true", help="Also measure hybrid retrieval with a cross-encoder")
+    parser.add_argument("--reranker", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    args = parser.parse_args()
+
+    with open(args.labels, "r", encoding="utf-8") as file:
+        labels = [json.loads(line) for line in file if line.strip()]
+    questions = [label["question"] for label in labels]
+    answers = [normalize(label["answer"]) for label in labels]
+
+    model = get_embedding_model(args.model)
+    chunks = list(get_chunker("token", model=model).iter_chunks(strip_repeated_lines(iter_pdf_pages(args.pdf))))
+    index = build_index(np.asarray(model.encode(chunks, batch_size=64), dtype="float32"), "flat")
+
+    start = time.perf_counter()
+    lexical_index = BM25Index({"chunk_id": i, "text": chunk} for i, chunk in enumerate(chunks))
+    bm25_build_ms = 1000 * (time.perf_counter() - start)
+
+    def dense_search(queries, top_k, query_embeddings=None):
+        return retrieve_contexts(index, model, chunks, queries, top_k=top_k, query_embeddings=query_embeddings)
+
+    retrievers = {
+        "dense": lambda query: dense_search([query], args.k)[0],
+        "bm25": lambda query: lexical_index.search([query], args.k)[0],
+        "hybrid": lambda query: hybrid_search(dense_search, lexical_index, [query], args.k)[0],
+    }
+    if args.rerank:
+        reranker = get_cross_encoder(args.reranker)
+        retrievers["hybrid+rerank"] = lambda query: hybrid_search(dense_search, lexical_index, [query], args.k, reranker)[0]
+
+    header = f"{'retriever':<14} {'hit@k':>7} {'mrr':>6} {'p50 ms':>8} {'p95 ms':>8}"
+    print(f"{len(chunks)} chunks, {len(questions)} questions, k={args.k}, BM25 built in {bm25_build_ms:.0f} ms\n")
+    print(header)
+    print("-" * len(header))
+
+    for name, retrieve in retrievers.items():
+        retrieve(questions[0])  # Warm up model and caches
+        latencies, hits, reciprocal_ranks = [], 0, []
+        for question, answer in zip(questions, answers):
+            start = time.perf_counter()
+            results = retrieve(question)
+            latencies.append(1000 * (time.perf_counter() - start))
+            ranks = [rank for rank, result in enumerate(results, 1) if answer in normalize(result["text"])]
+            hits += bool(ranks)
+            reciprocal_ranks.append(1 / ranks[0] if ranks else 0.0)
+
+        print(
+            f"{name:<14} {hits / max(len(questions), 1):>7.2%} {np.mean(reciprocal_ranks):>6.3f} "
+            f"{np.percentile(latencies, 50):>8.1f} {np.percentile(latencies, 95):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
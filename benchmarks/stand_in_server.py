@@ -0,0 +1,230 @@
+"""
+A local stand-in for the Serper, Cohere, Kaggle, Hugging Face and GitHub APIs that replays recorded responses
+with injected latency and errors, so the agents can be benchmarked without network access or API keys.
+
+Responses come from a fixtures file mapping "<provider>.<endpoint>" (the response cache's naming) to a list
+of recorded values; each request gets one of them, chosen by a hash of the request so repeats are stable.
+Each provider is served under its own path prefix. Point the agents at it with:
+
+    PROVIDER_BASE_URLS=google.serper.dev=http://127.0.0.1:8900/serper,huggingface.co=http://127.0.0.1:8900/huggingface,...
+    CO_API_URL=http://127.0.0.1:8900/cohere
+    KAGGLE_API_ENDPOINT=http://127.0.0.1:8900/kaggle
+
+(`environment(url)` builds these; the Cohere and Kaggle SDKs read their own endpoint variables). Record fixtures from a real run's response cache with:
+
+    python benchmarks/stand_in_server.py --export-cache .cache/responses.sqlite3 --fixtures my_fixtures.json
+"""
+import os
+import json
+import time
+import random
+import sqlite3
+import zlib
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "providers.json")
+
+# Typical latency of each provider endpoint, in seconds; scaled by --latency-scale
+LATENCIES = {
+    "serper.search": 0.4,
+    "cohere.generate": 3.0,
+    "cohere.chat": 4.0,
+    "kaggle.dataset_list": 0.8,
+    "huggingface.datasets": 0.5,
+    "github.search_repositories": 0.6,
+}
+
+# Hosts the agents call through http_client, and the path prefix each is served under
+PROVIDER_HOSTS = {
+    "google.serper.dev": "serper",
+    "huggingface.co": "huggingface",
+    "api.github.com": "github",
+}
+
+
+def route(method, path):
+    """
+    Maps a request to the fixture key of the provider endpoint it stands in for, or None.
+    """
+    if method == "POST" and path == "/serper/search":
+        return "serper.search"
+    if method == "POST" and path.startswith("/cohere/") and path.endswith("/generate"):
+        return "cohere.generate"
+    if method == "POST" and path.startswith("/cohere/") and path.endswith("/chat"):
+        return "cohere.chat"
+    if method == "GET" and path == "/kaggle/api/v1/datasets/list":
+        return "kaggle.dataset_list"
+    if method == "GET" and path == "/huggingface/api/datasets":
+        return "huggingface.datasets"
+    if method == "GET" and path == "/github/search/repositories":
+        return "github.search_repositories"
+    return None
+
+
+def response_body(key, value, request):
+    """
+    Wraps a recorded value (what the agents keep from a response) in the provider's response format.
+    """
+    if key == "cohere.generate":
+        return {
+            "id": "stand-in",
+            "generations": [{"id": "stand-in", "text": value}],
+            "meta": {"billed_units": {"input_tokens": len(request.get("prompt", "")) // 4, "output_tokens": len(value) // 4}},
+        }
+    if key == "cohere.chat":
+        return {
+            "response_id": "stand-in",
+            "generation_id": "stand-in",
+            "text": value,
+            "finish_reason": "COMPLETE",
+            "meta": {"billed_units": {"input_tokens": len(request.get("message", "")) // 4, "output_tokens": len(value) // 4}},
+        }
+    if key == "kaggle.dataset_list":
+        return [
+            {"ref": ref, "title": ref.split("/")[-1], "tags": [], "files": [], "versions": [], "totalBytes": 0}
+            for ref in value
+        ]
+    if key == "github.search_repositories":
+        return {"total_count": len(value), "incomplete_results": False, "items": value}
+    return value
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixtures, latency_scale=1.0, error_rate=0.0, seed=0):
+        super().__init__(address, StandInHandler)
+        self.fixtures = fixtures
+        self.latency_scale = latency_scale
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = Counter()
+        self.errors = Counter()
+        self.lock = threading.Lock()
+
+    def stats(self):
+        with self.lock:
+            return {"requests": dict(self.requests), "errors": dict(self.errors)}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real APIs
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method):
+        url = urlparse(self.path)
+        if method == "GET" and url.path == "/stats":
+            self._send(200, self.server.stats())
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        key = route(method, url.path)
+        if key is None or not self.server.fixtures.get(key):
+            self._send(404, {"message": f"No stand-in for {method} {url.path}"})
+            return
+
+        request = json.loads(raw) if raw else {}
+        with self.server.lock:
+            self.server.requests[key] += 1
+            jitter = self.server.random.uniform(0.5, 1.5)
+            failed = self.server.random.random() < self.server.error_rate
+            if failed:
+                self.server.errors[key] += 1
+        time.sleep(LATENCIES.get(key, 0.5) * self.server.latency_scale * jitter)
+        if failed:
+            self._send(503, {"message": "Injected stand-in error"})
+            return
+
+        # Same request, same recorded response
+        values = self.server.fixtures[key]
+        value = values[zlib.crc32(raw + url.query.encode("utf-8")) % len(values)]
+        self._send(200, response_body(key, value, request))
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def load_fixtures(path=FIXTURES_PATH):
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def start_server(fixtures_path=FIXTURES_PATH, port=0, latency_scale=1.0, error_rate=0.0, seed=0):
+    """
+    Starts the stand-in server on a background thread and returns (server, base URL).
+    """
+    server = StandInServer(("127.0.0.1", port), load_fixtures(fixtures_path), latency_scale, error_rate, seed)
+    threading.Thread(target=server.serve_forever, name="stand-in-server", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def environment(url):
+    """
+    Environment variables that route the agents' provider calls to the stand-in server at `url`.
+    """
+    return {
+        "PROVIDER_BASE_URLS": ",".join(f"{host}={url}/{prefix}" for host, prefix in PROVIDER_HOSTS.items()),
+        "CO_API_URL": f"{url}/cohere",
+        "KAGGLE_API_ENDPOINT": f"{url}/kaggle",
+        "KAGGLE_USERNAME": "stand-in",
+        "KAGGLE_KEY": "stand-in",
+    }
+
+
+def export_cache(cache_path, fixtures_path, per_endpoint=20):
+    """
+    Writes up to `per_endpoint` recorded responses per provider endpoint from a response cache to a fixtures file.
+    """
+    connection = sqlite3.connect(cache_path)
+    fixtures = {}
+    for provider, endpoint, value in connection.execute(
+        "SELECT provider, endpoint, value FROM responses ORDER BY accessed_at DESC"
+    ):
+        values = fixtures.setdefault(f"{provider}.{endpoint}", [])
+        if len(values) < per_endpoint:
+            values.append(json.loads(value))
+    connection.close()
+    with open(fixtures_path, "w", encoding="utf-8") as file:
+        json.dump(fixtures, file, indent=2)
+    return {key: len(values) for key, values in fixtures.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in server for the provider APIs")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--fixtures", default=FIXTURES_PATH, help="Recorded responses (JSON)")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiplier for the typical provider latencies")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 503")
+    parser.add_argument("--export-cache", help="Write the fixtures file from this response cache and exit")
+    args = parser.parse_args()
+
+    if args.export_cache:
+        counts = export_cache(args.export_cache, args.fixtures)
+        print(f"Exported {sum(counts.values())} responses to '{args.fixtures}': {counts}")
+    else:
+        server, url = start_server(args.fixtures, args.port, args.latency_scale, args.error_rate)
+        print(f"Stand-in server on {url}. Set:")
+        for name, value in environment(url).items():
+            print(f"  {name}={value}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print(f"Served {server.stats()}")
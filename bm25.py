@@ -0,0 +1,68 @@
+import re
+import math
+from collections import Counter, defaultdict
+
+import numpy as np
+
+# Keeps numbers such as 1,250.5 and 12%, tickers such as $TSLA and hyphenated names as single terms
+TOKEN = re.compile(r"\$?[a-z0-9]+(?:[.,'&-][a-z0-9]+)*%?")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the this to was were what "
+    "when where which who why will with".split()
+)
+
+
+def tokenize(text):
+    return [token for token in TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index of chunk terms, for exact matches on names, tickers and numbers
+    that dense embeddings tend to blur. `records` are dicts with at least "chunk_id" and "text";
+    search results are copies of them with a "bm25" score.
+    """
+
+    def __init__(self, records, k1=1.5, b=0.75):
+        self.records = list(records)
+        self.k1 = k1
+        self.b = b
+        lengths = []
+        postings = defaultdict(lambda: ([], []))
+        for position, record in enumerate(self.records):
+            counts = Counter(tokenize(record["text"]))
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                postings[term][0].append(position)
+                postings[term][1].append(count)
+
+        self.lengths = np.asarray(lengths, dtype="float32")
+        average = float(self.lengths.mean()) if lengths and self.lengths.mean() > 0 else 1.0
+        self.norms = self.k1 * (1 - self.b + self.b * self.lengths / average)
+        total = len(self.records)
+        self.postings = {}
+        for term, (positions, counts) in postings.items():
+            idf = math.log(1 + (total - len(positions) + 0.5) / (len(positions) + 0.5))
+            self.postings[term] = (np.asarray(positions, dtype="int64"), np.asarray(counts, dtype="float32"), idf)
+
+    def scores(self, query):
+        scores = np.zeros(len(self.records), dtype="float32")
+        for term in set(tokenize(query)):
+            if term in self.postings:
+                positions, counts, idf = self.postings[term]
+                scores[positions] += idf * counts * (self.k1 + 1) / (counts + self.norms[positions])
+        return scores
+
+    def search(self, queries, top_k=10):
+        """
+        Returns one ranked list per query of matching records with their "bm25" scores.
+        """
+        results = []
+        for query in queries:
+            scores = self.scores(query)
+            matches = np.flatnonzero(scores)
+            if len(matches) > top_k:
+                matches = matches[np.argpartition(-scores[matches], top_k - 1)[:top_k]]
+            ranked = matches[np.argsort(-scores[matches], kind="stable")]
+            results.append([dict(self.records[i], bm25=float(scores[i])) for i in ranked])
+        return results
@@ -0,0 +1,222 @@
+import re
+from collections import Counter
+from itertools import chain, islice
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+DIGITS = re.compile(r"\d+")
+
+# Header/footer detection
+HEADER_SAMPLE_PAGES = 20  # Pages inspected before streaming the rest
+HEADER_EDGE_LINES = 2  # Lines at the top and bottom of a page that can be headers or footers
+HEADER_MIN_RATIO = 0.5  # Share of sampled pages a line must repeat on
+
+
+def _normalize_line(line):
+    # Page numbers and dates vary between otherwise identical headers
+    return DIGITS.sub("#", " ".join(line.lower().split()))
+
+
+def _edge_lines(lines, edge_lines):
+    # Indices of the first and last non-blank lines; short pages have no separate header or footer
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    if len(filled) <= 2 * edge_lines:
+        return []
+    return filled[:edge_lines] + filled[-edge_lines:]
+
+
+def strip_repeated_lines(pages, sample_pages=HEADER_SAMPLE_PAGES, edge_lines=HEADER_EDGE_LINES, min_ratio=HEADER_MIN_RATIO):
+    """
+    Removes running headers and footers: lines near the top or bottom of a page that repeat across pages.
+    Only the first `sample_pages` pages are buffered to find them; the rest stream through.
+    """
+    pages = iter(pages)
+    sample = list(islice(pages, sample_pages))
+
+    counts = Counter()
+    for page in sample:
+        lines = page.splitlines()
+        counts.update({_normalize_line(lines[i]) for i in _edge_lines(lines, edge_lines)})
+    threshold = max(2, min_ratio * len(sample))
+    repeated = {line for line, count in counts.items() if count >= threshold} if len(sample) >= 3 else set()
+
+    for page in chain(sample, pages):
+        if not repeated:
+            yield page
+            continue
+        lines = page.splitlines()
+        edges = set(_edge_lines(lines, edge_lines))
+        yield "\n".join(
+            line for i, line in enumerate(lines)
+            if i not in edges or _normalize_line(line) not in repeated
+        )
+
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in SENTENCE_END.split(text) if sentence.strip()]
+
+
+class TokenCounter:
+    """
+    Counts tokens with the embedding model's tokenizer, or estimates them from word counts without one.
+    """
+
+    def __init__(self, tokenizer=None):
+        self.tokenizer = tokenizer
+
+    def count_many(self, texts):
+        if not texts:
+            return []
+        if self.tokenizer is None:
+            return [int(len(text.split()) * 1.3) + 1 for text in texts]
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def special_tokens(self):
+        """
+        Tokens the tokenizer adds to every input, such as T5's closing </s>; not included in count_many.
+        """
+        return self.tokenizer.num_special_tokens_to_add() if self.tokenizer is not None else 0
+
+    def truncate(self, text, max_tokens):
+        """
+        Returns the leading part of `text` that fits in `max_tokens` tokens.
+        """
+        if max_tokens <= 0:
+            return ""
+        if self.tokenizer is None:
+            return " ".join(text.split()[:int((max_tokens - 1) / 1.3)])
+        ids = self.tokenizer(text, add_special_tokens=False)["input_ids"][:max_tokens]
+        return self.tokenizer.decode(ids, skip_special_tokens=True)
+
+
+class FixedChunker:
+    """
+    Fixed-size character windows, streamed across page boundaries.
+    """
+
+    name = "fixed"
+
+    def __init__(self, chunk_size=512, clean=None):
+        self.chunk_size = chunk_size
+        self.clean = clean or (lambda text: text)
+
+    def params(self):
+        return {"chunker": self.name, "chunk_size": self.chunk_size}
+
+    def iter_chunks(self, pages):
+        buffer = ""
+        for page in pages:
+            page = self.clean(page)
+            if not page:
+                continue
+            buffer = f"{buffer} {page}" if buffer else page
+            start = 0
+            while len(buffer) - start >= self.chunk_size:
+                yield buffer[start:start + self.chunk_size]
+                start += self.chunk_size
+            buffer = buffer[start:]
+        if buffer:
+            yield buffer
+
+
+class SentenceChunker:
+    """
+    One chunk per sentence.
+    """
+
+    name = "sentence"
+
+    def __init__(self, clean=None):
+        self.clean = clean or (lambda text: text)
+
+    def params(self):
+        return {"chunker": self.name}
+
+    def iter_chunks(self, pages):
+        for page in pages:
+            for paragraph in PARAGRAPH_BREAK.split(page):
+                yield from split_sentences(self.clean(paragraph))
+
+
+class TokenChunker:
+    """
+    Packs whole sentences into chunks of at most `max_tokens` tokens, closing chunks at paragraph
+    boundaries once they are at least half full. Consecutive chunks share up to `overlap_tokens`
+    tokens of trailing sentences. Sentences longer than `max_tokens` are split on word boundaries.
+    """
+
+    name = "token"
+
+    def __init__(self, counter, max_tokens=254, overlap_tokens=32, clean=None):
+        self.counter = counter
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.clean = clean or (lambda text: text)
+
+    def params(self):
+        return {"chunker": self.name, "max_tokens": self.max_tokens, "overlap_tokens": self.overlap_tokens}
+
+    def _split_long(self, sentence, tokens):
+        if tokens <= self.max_tokens:
+            return [(sentence, tokens)]
+        words = sentence.split()
+        per_piece = max(1, len(words) * self.max_tokens // tokens)
+        pieces = [" ".join(words[i:i + per_piece]) for i in range(0, len(words), per_piece)]
+        return list(zip(pieces, self.counter.count_many(pieces)))
+
+    def _overlap(self, window):
+        tail, tokens = [], 0
+        for sentence, count in reversed(window):
+            if tokens + count > self.overlap_tokens:
+                break
+            tail.insert(0, (sentence, count))
+            tokens += count
+        return tail
+
+    def iter_chunks(self, pages):
+        window, window_tokens = [], 0
+        pending = 0  # Sentences in the window not yet emitted in a chunk
+
+        def flush():
+            nonlocal window, window_tokens, pending
+            chunk = " ".join(text for text, _ in window)
+            window = self._overlap(window)
+            window_tokens = sum(tokens for _, tokens in window)
+            pending = 0
+            return chunk
+
+        for page in pages:
+            for paragraph in PARAGRAPH_BREAK.split(page):
+                sentences = split_sentences(self.clean(paragraph))
+                for sentence, count in zip(sentences, self.counter.count_many(sentences)):
+                    for piece, piece_tokens in self._split_long(sentence, count):
+                        if pending and window_tokens + piece_tokens > self.max_tokens:
+                            yield flush()
+                        while window and window_tokens + piece_tokens > self.max_tokens:
+                            window_tokens -= window.pop(0)[1]
+                        window.append((piece, piece_tokens))
+                        window_tokens += piece_tokens
+                        pending += 1
+
+                if pending and window_tokens >= self.max_tokens // 2:
+                    yield flush()
+
+        if pending:
+            yield flush()
+
+
+def get_chunker(name, model=None, clean=None, **params):
+    """
+    Builds a chunker by name: "fixed", "sentence" or "token".
+    The token chunker sizes chunks to the model's maximum sequence length and counts with its tokenizer.
+    """
+    if name == "fixed":
+        return FixedChunker(clean=clean, **params)
+    if name == "sentence":
+        return SentenceChunker(clean=clean)
+    if name == "token":
+        tokenizer = getattr(model, "tokenizer", None)
+        max_seq_length = getattr(model, "max_seq_length", None) or 256
+        params.setdefault("max_tokens", max_seq_length - 2)  # Room for [CLS] and [SEP]
+        return TokenChunker(TokenCounter(tokenizer), clean=clean, **params)
+    raise ValueError(f"Unknown chunker '{name}', expected 'fixed', 'sentence' or 'token'")
@@ -0,0 +1,74 @@
+import re
+
+from chunking import split_sentences
+from generators import build_prompt
+
+
+def _sentence_key(sentence):
+    return re.sub(r"\W+", " ", sentence.lower()).strip()
+
+
+def pack_context(results, question, generator):
+    """
+    Builds the prompt context from ranked retrieval results within the generator's input token budget.
+
+    Chunks are taken in relevance order. Sentences already included (such as the overlap between
+    consecutive chunks) are dropped, and chunks that no longer fit are skipped in favour of later, shorter
+    ones. If not even the best chunk fits, as many of its leading sentences as fit are used, cutting the
+    first one to the budget when it is too long on its own. The tokenizer's special tokens are reserved.
+    Returns (context, usage) where usage reports "tokens", "budget", "chunks" used and "dropped".
+    """
+    counter = generator.counter
+    limit = generator.max_input_tokens - counter.special_tokens()
+    budget = limit - counter.count_many([build_prompt("", question)])[0]
+    seen = set()
+    parts, used, chunks, dropped = [], 0, 0, 0
+
+    for result in results:
+        sentences = []
+        for sentence in split_sentences(result["text"]):
+            key = _sentence_key(sentence)
+            if key and key not in seen:
+                seen.add(key)
+                sentences.append(sentence)
+        if not sentences:
+            continue  # Entirely covered by earlier chunks
+
+        counts = counter.count_many(sentences)
+        if used + sum(counts) <= budget:
+            parts.extend(sentences)
+            used += sum(counts)
+            chunks += 1
+        elif not parts:
+            fitting = 0
+            while fitting < len(sentences) and used + counts[fitting] <= budget:
+                used += counts[fitting]
+                fitting += 1
+            for sentence in sentences[max(fitting, 1):]:
+                seen.discard(_sentence_key(sentence))  # Not packed, so a later chunk may still include them
+            if not fitting:
+                seen.discard(_sentence_key(sentences[0]))  # Only a cut-down copy is packed
+                sentences = [counter.truncate(sentences[0], budget)]
+                fitting, used = 1, counter.count_many(sentences)[0]
+            parts.extend(sentences[:fitting])
+            chunks += 1
+        else:
+            for sentence in sentences:
+                seen.discard(_sentence_key(sentence))  # A later chunk may still include them
+            dropped += 1
+
+    # Sentences can tokenize slightly differently once joined into the prompt; trim until it fits
+    context = " ".join(parts)
+    excess = counter.count_many([build_prompt(context, question)])[0] - limit
+    while parts and excess > 0:
+        if len(parts) > 1:
+            parts.pop()
+        else:
+            shorter = counter.truncate(parts[0], counter.count_many([parts[0]])[0] - excess)
+            parts[0] = shorter if shorter != parts[0] else ""
+        context = " ".join(parts).strip()
+        excess = counter.count_many([build_prompt(context, question)])[0] - limit
+        if not context:
+            break
+    used = counter.count_many([context])[0] if context else 0
+    return context, {"tokens": used, "budget": budget, "chunks": chunks, "dropped": dropped}
@@ -0,0 +1,256 @@
+import os
+import json
+import hashlib
+import logging
+
+import faiss
+import numpy as np
+
+from ann_index import INDEX_TYPE, build_index, set_search_params
+from bm25 import BM25Index
+from retrieval import encode_queries
+import telemetry
+
+# Where the corpus index, metadata and per-document embeddings are persisted
+CORPUS_DIR = os.getenv("CORPUS_DIR", os.path.join(".cache", "corpus"))
+
+INDEX_FILE = "index.faiss"
+METADATA_FILE = "corpus.json"
+EMBEDDINGS_DIR = "embeddings"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CorpusIndex:
+    """
+    One FAISS index over the chunks of many PDFs, kept in sync with a directory incrementally.
+
+    Chunk vectors live in an `IndexIDMap` under stable chunk ids, so a document can be added, replaced
+    or removed without touching the others. Each document's embeddings are also stored on disk keyed by
+    its content hash, so unchanged (or merely renamed) documents are never re-embedded.
+
+    `extract(path)` returns a document's content (such as its page texts) and `chunk(content)` splits
+    it into chunk strings; the chat front ends pass their own PDF extraction and chunking functions.
+    `chunk_params` describes the chunking so stored embeddings are only reused with the same settings.
+    """
+
+    def __init__(self, model, model_name, extract, chunk, chunk_params=None, corpus_dir=CORPUS_DIR, index_type=INDEX_TYPE):
+        self.model = model
+        self.model_name = model_name
+        self.extract = extract
+        self.chunk = chunk
+        self.chunk_params = chunk_params or {}
+        self.corpus_dir = corpus_dir
+        self.index_type = index_type
+        self.documents = {}  # path -> {"sha256", "mtime", "size", "chunk_ids"}
+        self.chunks = {}  # chunk id -> {"path", "text"}
+        self.next_id = 0
+        self.index = None
+        self._bm25 = None  # (chunk set version, BM25Index)
+        os.makedirs(os.path.join(corpus_dir, EMBEDDINGS_DIR), exist_ok=True)
+        self.load()
+
+    # Persistence
+
+    def load(self):
+        """
+        Loads the persisted corpus if it was built with the same model and index type.
+        """
+        metadata_path = os.path.join(self.corpus_dir, METADATA_FILE)
+        if not os.path.exists(metadata_path):
+            return
+        with open(metadata_path, "r", encoding="utf-8") as file:
+            metadata = json.load(file)
+        settings = (metadata.get("model"), metadata.get("chunking"), metadata.get("index_type"))
+        if settings != (self.model_name, self.chunk_params, self.index_type):
+            logging.info("Corpus was built with different model, chunking or index settings; it will be rebuilt")
+            return
+        self.documents = metadata["documents"]
+        self.chunks = {int(chunk_id): chunk for chunk_id, chunk in metadata["chunks"].items()}
+        self.next_id = metadata["next_id"]
+        self.index = set_search_params(faiss.read_index(os.path.join(self.corpus_dir, INDEX_FILE)))
+
+    def save(self):
+        if self.index is None:
+            return
+        metadata = {
+            "model": self.model_name,
+            "chunking": self.chunk_params,
+            "index_type": self.index_type,
+            "next_id": self.next_id,
+            "documents": self.documents,
+            "chunks": {str(chunk_id): chunk for chunk_id, chunk in self.chunks.items()},
+        }
+        faiss.write_index(self.index, os.path.join(self.corpus_dir, INDEX_FILE + ".tmp"))
+        with open(os.path.join(self.corpus_dir, METADATA_FILE + ".tmp"), "w", encoding="utf-8") as file:
+            json.dump(metadata, file)
+        os.replace(os.path.join(self.corpus_dir, INDEX_FILE + ".tmp"), os.path.join(self.corpus_dir, INDEX_FILE))
+        os.replace(os.path.join(self.corpus_dir, METADATA_FILE + ".tmp"), os.path.join(self.corpus_dir, METADATA_FILE))
+
+    def _embeddings_path(self, sha256):
+        settings = json.dumps({"model": self.model_name, "chunking": self.chunk_params}, sort_keys=True)
+        key = hashlib.sha256(f"{sha256}:{settings}".encode("utf-8")).hexdigest()
+        return os.path.join(self.corpus_dir, EMBEDDINGS_DIR, f"{key}.npz")
+
+    def _embed_document(self, path, sha256):
+        """
+        Returns (chunks, embeddings) for a document, from the content-addressed store when possible.
+        """
+        stored_path = self._embeddings_path(sha256)
+        if os.path.exists(stored_path):
+            stored = np.load(stored_path, allow_pickle=False)
+            return [str(text) for text in stored["chunks"]], stored["embeddings"]
+
+        chunks = self.chunk(self.extract(path))
+        if not chunks:
+            return [], np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype="float32")
+        with telemetry.span("embed.chunks", items=len(chunks)):
+            embeddings = np.asarray(self.model.encode(chunks, convert_to_numpy=True), dtype="float32")
+        np.savez(stored_path, chunks=np.array(chunks), embeddings=embeddings)
+        return chunks, embeddings
+
+    # Incremental updates
+
+    def add_document(self, path):
+        """
+        Adds (or replaces) one document's chunks in the index.
+        """
+        path = os.path.abspath(path)
+        if path in self.documents:
+            self.remove_document(path, rebuild=False)
+
+        sha256 = file_sha256(path)
+        chunks, embeddings = self._embed_document(path, sha256)
+        chunk_ids = list(range(self.next_id, self.next_id + len(chunks)))
+        self.next_id += len(chunks)
+
+        for chunk_id, text in zip(chunk_ids, chunks):
+            self.chunks[chunk_id] = {"path": path, "text": text}
+        stat = os.stat(path)
+        self.documents[path] = {"sha256": sha256, "mtime": stat.st_mtime, "size": stat.st_size, "chunk_ids": chunk_ids}
+
+        # Without an index yet, vectors are picked up by the next rebuild
+        if self.index is not None and chunks:
+            self.index.add_with_ids(embeddings, np.asarray(chunk_ids, dtype="int64"))
+
+    def remove_document(self, path, rebuild=True):
+        """
+        Removes one document's chunks from the index.
+        """
+        path = os.path.abspath(path)
+        document = self.documents.pop(path, None)
+        if document is None:
+            return
+        for chunk_id in document["chunk_ids"]:
+            self.chunks.pop(chunk_id, None)
+        if self.index is None or not document["chunk_ids"]:
+            return
+        try:
+            self.index.remove_ids(np.asarray(document["chunk_ids"], dtype="int64"))
+        except RuntimeError:
+            # Graph indexes (HNSW) can't delete vectors; rebuild from the stored embeddings instead
+            if rebuild:
+                self.rebuild()
+            else:
+                self.index = None
+
+    def rebuild(self):
+        """
+        Rebuilds the index from the stored per-document embeddings, retraining IVF/PQ centroids.
+        """
+        all_ids, all_embeddings = [], []
+        for path, document in self.documents.items():
+            if not document["chunk_ids"]:
+                continue
+            stored = np.load(self._embeddings_path(document["sha256"]), allow_pickle=False)
+            all_ids.extend(document["chunk_ids"])
+            all_embeddings.append(stored["embeddings"])
+        dimension = self.model.get_sentence_embedding_dimension()
+        embeddings = np.vstack(all_embeddings) if all_embeddings else np.zeros((0, dimension), dtype="float32")
+        self.index = build_index(embeddings, self.index_type, ids=all_ids)
+
+    def sync(self, pdf_dir, suffix=".pdf"):
+        """
+        Brings the index in line with the PDFs under `pdf_dir`: new files are added, changed files
+        re-indexed and deleted files removed. Returns the paths in each category.
+        """
+        found = set()
+        for root, _, files in os.walk(pdf_dir):
+            for name in files:
+                if name.lower().endswith(suffix):
+                    found.add(os.path.abspath(os.path.join(root, name)))
+
+        summary = {"added": [], "updated": [], "removed": [], "unchanged": []}
+        for path in sorted(set(self.documents) - found):
+            self.remove_document(path, rebuild=False)
+            summary["removed"].append(path)
+
+        for path in sorted(found):
+            document = self.documents.get(path)
+            if document is None:
+                self.add_document(path)
+                summary["added"].append(path)
+                continue
+            stat = os.stat(path)
+            if stat.st_mtime == document["mtime"] and stat.st_size == document["size"]:
+                summary["unchanged"].append(path)
+            elif file_sha256(path) == document["sha256"]:
+                document.update(mtime=stat.st_mtime, size=stat.st_size)  # Touched, content unchanged
+                summary["unchanged"].append(path)
+            else:
+                self.add_document(path)
+                summary["updated"].append(path)
+
+        if self.index is None:
+            self.rebuild()
+        self.save()
+        return summary
+
+    # Querying
+
+    def content_hash(self):
+        """
+        Identifies the indexed document contents; it changes whenever a document is added, updated or removed.
+        """
+        shas = sorted(document["sha256"] for document in self.documents.values())
+        return hashlib.sha256(":".join(shas).encode("utf-8")).hexdigest()
+
+    def lexical_index(self):
+        """
+        Returns a BM25 index over all chunks, rebuilt only after the documents change.
+        """
+        key = (self.next_id, len(self.chunks))  # Every add allocates new ids and every removal drops chunks
+        if self._bm25 is None or self._bm25[0] != key:
+            records = [{"chunk_id": chunk_id, "path": chunk["path"], "text": chunk["text"]} for chunk_id, chunk in self.chunks.items()]
+            self._bm25 = (key, BM25Index(records))
+        return self._bm25[1]
+
+    def search(self, queries, top_k=3, query_embeddings=None):
+        """
+        Retrieves the top-k chunks across all documents for each query.
+        Returns one ranked list per query of {"chunk_id", "path", "text", "distance"} dicts.
+        """
+        if self.index is None:
+            self.rebuild()
+        if not queries or self.index.ntotal == 0:
+            return [[] for _ in queries]
+        if query_embeddings is None:
+            query_embeddings = encode_queries(self.model, queries)
+        query_matrix = np.ascontiguousarray(query_embeddings, dtype="float32").reshape(len(queries), -1)
+        with telemetry.span("faiss.search", items=len(queries)):
+            distances, ids = self.index.search(query_matrix, min(top_k, self.index.ntotal))
+        results = []
+        for row_distances, row_ids in zip(distances, ids):
+            row = []
+            for distance, chunk_id in zip(row_distances, row_ids):
+                chunk = self.chunks.get(int(chunk_id))  # FAISS pads missing neighbours with -1
+                if chunk is not None:
+                    row.append({"chunk_id": int(chunk_id), "path": chunk["path"], "text": chunk["text"], "distance": float(distance)})
+            results.append(row)
+        return results
@@ -1,22 +1,34 @@
 import os
 import re
-import requests
 import json
 from fpdf import FPDF
 from kaggle.api.kaggle_api_extended import KaggleApi
-from sentence_transformers import SentenceTransformer
+import hashlib
 from cohere import Client
-import PyPDF2
-import faiss
+from pdf_extract import iter_pdf_pages
 import numpy as np
 import streamlit as st
+from retrieval import encode_queries, hybrid_search, retrieve_contexts
+from bm25 import BM25Index
+from index_store import load_or_build_index
+from ann_index import INDEX_TYPE, build_index, set_search_params
+from chunking import get_chunker
+from model_registry import get_embedding_model, model_key
+from streaming import TimedStream
+from generators import get_generator, generate_answers, stream_answer
+from context_packing import pack_context
+from semantic_cache import SemanticAnswerCache
+from jobs import JOB_RUNNER, JOB_WORKERS, JobQueue, WorkerPool
+import telemetry
 
 # Configure environment and logging
 SERPER_API_KEY = os.getenv("SERPER_API_KEY", "your serper api key")
 COHERE_API_KEY = os.getenv("COHERE_API_KEY", "your cohere api key")
-HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY", "your hugging face token")
 GITHUB_API_KEY = os.getenv("GITHUB_API_KEY", "your github secret")
 KAGGLE_JSON_PATH = os.getenv("KAGGLE_JSON_PATH", r"location to kaggle api json file")
+# Set to 0 when pipeline jobs are run by separate `python jobs.py worker` processes
+EMBEDDED_JOB_WORKERS = int(os.getenv("EMBEDDED_JOB_WORKERS", str(JOB_WORKERS)))
+JOB_POLL_SECONDS = 2
 
 # Initialize Cohere Client
 co = Client(COHERE_API_KEY)
@@ -33,51 +45,142 @@ def format_as_bullets(items):
     return "\n".join([f"- {item}" for item in items])
 
 def extract_text_from_pdf(pdf_file):
-    """Extract text from a PDF file."""
+    """Extract text from a PDF file. Raises ValueError on failure so no index is stored for it."""
     try:
-        reader = PyPDF2.PdfReader(pdf_file)
-        text = "".join(page.extract_text() for page in reader.pages if page.extract_text())
-        return text
+        # Extract in-process: Streamlit scripts can't be re-imported by spawned worker processes
+        return "".join(iter_pdf_pages(pdf_file, workers=1))
     except Exception as e:
-        return f"Error extracting text: {e}"
+        raise ValueError(f"Error extracting text: {e}") from e
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+def embed_sentences(model, text):
+    """Split text into token-sized chunks and return (index, chunks, embeddings)."""
+    sentences = list(get_chunker("token", model=model).iter_chunks([text]))
+    with telemetry.span("embed.chunks", items=len(sentences)):
+        embeddings = np.asarray(model.encode(sentences), dtype="float32")
+    index = build_index(embeddings, INDEX_TYPE)
+    return index, sentences, embeddings
 
 def create_embeddings_and_index(text):
     """Create embeddings and FAISS index from the given text."""
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    sentences = [sentence.strip() for sentence in text.split(". ") if sentence]
-    embeddings = model.encode(sentences)
-    index = faiss.IndexFlatL2(embeddings.shape[1])
-    index.add(embeddings)
+    model = get_embedding_model(MODEL_NAME)
+    index, sentences, _ = embed_sentences(model, text)
     return index, sentences, model
 
-def retrieve_context(index, model, sentences, query):
-    """Retrieve the most relevant context from the FAISS index."""
+@st.cache_resource(show_spinner="Loading embedding model...")
+def load_embedding_model():
+    """Load the embedding model once per server process; it survives script reruns."""
+    return get_embedding_model(MODEL_NAME)
+
+@st.cache_resource(max_entries=8, show_spinner="Indexing PDF...")
+def load_pdf_index(pdf_sha256, _pdf_bytes):
+    """Return (index, sentences, bm25) for an uploaded PDF, cached across reruns by content hash
+    and reusing a stored index from disk when available."""
+    model = load_embedding_model()
+
+    def build():
+        pdf_text = extract_text_from_pdf(_pdf_bytes)
+        if not pdf_text:
+            raise ValueError("No text found in the uploaded PDF.")
+        return embed_sentences(model, pdf_text)
+
+    chunk_params = dict(get_chunker("token", model=model).params(), index=INDEX_TYPE)
+    index, sentences, _ = load_or_build_index(_pdf_bytes, model_key(MODEL_NAME), chunk_params, build)
+    bm25 = BM25Index({"chunk_id": i, "text": sentence} for i, sentence in enumerate(sentences))
+    return set_search_params(index), sentences, bm25
+
+def dense_search_fn(index, model, sentences):
+    """Bind dense FAISS search over the PDF's chunks for hybrid retrieval."""
+    def dense_search(queries, top_k, query_embeddings=None):
+        return retrieve_contexts(index, model, sentences, queries, top_k=top_k, query_embeddings=query_embeddings)
+    return dense_search
+
+def retrieve_context(index, model, sentences, bm25, query, query_embedding=None):
+    """Retrieve context with hybrid BM25 + FAISS search, packed into the generator's input budget.
+    Returns (context, usage)."""
     try:
-        query_vector = model.encode([query])
-        distances, indices = index.search(query_vector, 1)
-        return sentences[indices[0][0]] if indices[0][0] < len(sentences) else ""
+        query_embeddings = None if query_embedding is None else query_embedding[None, :]
+        dense_search = dense_search_fn(index, model, sentences)
+        results = hybrid_search(dense_search, bm25, [query], top_k=3, query_embeddings=query_embeddings)[0]
+        return pack_context(results, query, load_generator())
     except Exception as e:
-        return f"Error retrieving context: {e}"
-
-def generate_answer_with_hf_api(context, query):
-    """Generate an answer using Hugging Face API."""
-    headers = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}"}
-    payload = {
-        "inputs": f"Context: {context}\n\nQuestion: {query}\nAnswer:",
-        "parameters": {"max_length": 300, "temperature": 0.7},
-    }
+        return f"Error retrieving context: {e}", None
+
+@st.cache_data(max_entries=16, show_spinner="Answering questions...")
+def answer_questions(pdf_sha256, generator_name, questions, _index, _model, _sentences, _bm25):
+    """Answer a batch of questions once per PDF, generator and question list; reruns reuse the records."""
+    all_results = hybrid_search(dense_search_fn(_index, _model, _sentences), _bm25, questions, top_k=3)
+    contexts = [pack_context(results, question, load_generator())[0] for question, results in zip(questions, all_results)]
+    answers = generate_answers(load_generator(), contexts, questions)
+    return [
+        {"question": question, "contexts": results, "answer": answer}
+        for question, results, answer in zip(questions, all_results, answers)
+    ]
+
+@st.cache_resource(show_spinner="Loading answer generator...")
+def load_generator():
+    """Load the configured answer generator (CHAT_GENERATOR) once per server process."""
+    return get_generator()
+
+@st.cache_resource
+def load_answer_cache():
+    """Answers shared by all sessions of this server process, keyed on PDF hash and question embedding."""
+    return SemanticAnswerCache()
+
+@st.cache_resource
+def start_telemetry():
+    """Name this server's trace run and start the metrics endpoint (METRICS_PORT) once per process."""
+    return telemetry.start_run("app", print_at_exit=False)
+
+@st.cache_resource
+def load_job_queue():
+    """The pipeline job queue, with this server's worker pool started once per process."""
+    queue = JobQueue()
+    if EMBEDDED_JOB_WORKERS > 0:
+        WorkerPool(queue, EMBEDDED_JOB_WORKERS, runner=JOB_RUNNER).start()
+    return queue
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_jobs():
+    """Show this session's pipeline jobs, refreshed in place while the rest of the page stays idle."""
+    queue = load_job_queue()
+    for job in queue.list_jobs(job_ids=st.session_state.get("job_ids", [])):
+        company = job["params"]["company"]
+        if job["status"] == "succeeded":
+            report_path = job["result"]["report_path"]
+            st.success(f"{company}: report ready in {job['result']['seconds']:.0f}s")
+            # The PDF is only read once asked for, not on every refresh of the job list
+            requested = st.session_state.setdefault("report_downloads", set())
+            if job["id"] not in requested:
+                if st.button(f"Get {company} Report", key=f"prepare_{job['id']}"):
+                    requested.add(job["id"])
+                    st.rerun(scope="fragment")
+            else:
+                with open(report_path, "rb") as report_file:
+                    if st.download_button(
+                        f"Download {company} Report", data=report_file.read(),
+                        file_name=os.path.basename(report_path), key=f"download_{job['id']}",
+                    ):
+                        requested.discard(job["id"])
+        elif job["status"] == "failed":
+            st.error(f"{company}: {job['error']}")
+        elif job["status"] == "running":
+            st.progress(job["progress"], text=f"{company}: {job['message'] or 'Running'}")
+        elif job["status"] == "queued":
+            st.info(f"{company}: queued")
+        else:
+            st.warning(f"{company}: {job['status']}")
+
+def stream_answer_text(context, query):
+    """Stream an answer as it is generated."""
     try:
-        response = requests.post(
-            "https://api-inference.huggingface.co/models/google/flan-t5-large",
-            headers=headers,
-            json=payload
-        )
-        response.raise_for_status()
-        return response.json()[0]["generated_text"]
+        yield from stream_answer(load_generator(), context, query)
     except Exception as e:
-        return f"Error generating answer: {e}"
+        yield f"Error generating answer: {e}"
 
 # Streamlit App
+start_telemetry()
 st.title("AI Use Case Generator")
 st.sidebar.title("Configure Workflow")
 
@@ -157,31 +260,75 @@ if st.sidebar.button("Generate PDF Report"):
     else:
         st.error("Complete all steps before generating the PDF report.")
 
+# Full pipeline runs go through the job queue so slow provider calls never block the app
+if st.sidebar.button("Run Full Pipeline in Background"):
+    try:
+        job_id = load_job_queue().submit({"industry": industry, "company": company})
+        st.session_state.setdefault("job_ids", []).append(job_id)
+    except Exception as e:
+        st.error(f"Error queuing pipeline run: {e}")
+
+if st.session_state.get("job_ids"):
+    st.subheader("Pipeline Jobs")
+    show_jobs()
+
+# The chat stays open across the reruns triggered by typing questions
 if st.sidebar.button("Run AI Chat System"):
+    st.session_state["chat_enabled"] = True
+
+if st.session_state.get("chat_enabled"):
     st.subheader("AI Chat System")
     uploaded_pdf = st.file_uploader("Upload a PDF file to enable chat:", type=["pdf"])
 
     if uploaded_pdf is not None:
         try:
             st.write("Processing uploaded PDF...")
-            pdf_text = extract_text_from_pdf(uploaded_pdf)
-            if not pdf_text:
-                st.error("No text found in the uploaded PDF.")
+            try:
+                pdf_bytes = uploaded_pdf.getvalue()
+                model = load_embedding_model()
+                pdf_sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+                index, sentences, bm25 = load_pdf_index(pdf_sha256, pdf_bytes)
+            except ValueError as e:
+                st.error(str(e))
             else:
                 st.success("PDF successfully uploaded and processed!")
                 st.write("You can now ask questions about the content in the PDF.")
 
-                index, sentences, model = create_embeddings_and_index(pdf_text)
-
                 query = st.text_input("Ask a question about the uploaded PDF:")
                 if query:
-                    context = retrieve_context(index, model, sentences, query)
-                    if not context:
-                        st.error("No relevant context found for the question.")
-                    else:
-                        answer = generate_answer_with_hf_api(context, query)
+                    answer_cache = load_answer_cache()
+                    cache_scope = (pdf_sha256, load_generator().name)
+                    cached, embedding = answer_cache.get(cache_scope, query, lambda text: encode_queries(model, [text])[0])
+                    if cached is not None:
                         st.write(f"**Question:** {query}")
-                        st.write(f"**Answer:** {answer}")
+                        st.write(f"**Answer:** {cached}")
+                        st.caption(f"Answer served from cache (hit rate {answer_cache.stats()['hit_rate']:.0%})")
+                    else:
+                        context, usage = retrieve_context(index, model, sentences, bm25, query, embedding)
+                        if usage is None:
+                            st.error(context)
+                        elif not context:
+                            st.error("No relevant context found for the question.")
+                        else:
+                            st.write(f"**Question:** {query}")
+                            st.write("**Answer:**")
+                            answer = TimedStream(stream_answer_text(context, query))
+                            st.write_stream(answer)
+                            st.caption(f"Answer {answer.summary()}, context {usage['tokens']}/{usage['budget']} tokens")
+                            if answer.text.strip() and not answer.text.startswith("Error"):
+                                answer_cache.put(cache_scope, query, embedding, answer.text)
+
+                questions_file = st.file_uploader("Or upload a questions file (one per line) to answer in batch:", type=["txt"])
+                if questions_file is not None:
+                    questions = [line.strip() for line in questions_file.getvalue().decode("utf-8").splitlines() if line.strip()]
+                    # Cached, so typing in the question box doesn't re-answer the whole file
+                    records = answer_questions(pdf_sha256, load_generator().name, questions, index, model, sentences, bm25)
+                    st.write(f"Answered {len(records)} questions.")
+                    st.download_button(
+                        "Download Answers (JSONL)",
+                        data="\n".join(json.dumps(record) for record in records),
+                        file_name="answers.jsonl",
+                    )
         except Exception as e:
             st.error(f"An error occurred: {e}")
     else:
@@ -0,0 +1,210 @@
+import os
+import re
+import queue
+import logging
+import threading
+
+import http_client
+import telemetry
+from chunking import TokenCounter
+from streaming import stream_hf_generation
+
+# Answer generation settings
+GENERATOR = os.getenv("CHAT_GENERATOR", "hf-api")  # "hf-api", "local" or "stub"
+HF_API_MODEL = "google/flan-t5-large"
+HF_API_TOKEN = os.getenv("HF_API_TOKEN") or os.getenv("HUGGINGFACE_API_KEY", "Your_Default_Token")
+LOCAL_MODEL = os.getenv("CHAT_LOCAL_MODEL", "google/flan-t5-base")
+LOCAL_BACKEND = os.getenv("CHAT_LOCAL_BACKEND", "quantized")  # "torch", "quantized" (int8) or "onnx"
+MAX_NEW_TOKENS = 200
+MAX_INPUT_TOKENS = 512  # flan-t5 encoder length; longer prompts are truncated
+GENERATE_BATCH_SIZE = 8
+STREAM_TIMEOUT = float(os.getenv("CHAT_STREAM_TIMEOUT", "60"))  # Seconds to wait for the next streamed token
+
+_generators = {}
+_lock = threading.Lock()
+
+
+def build_prompt(context, question):
+    return f"Context: {context}\n\nQuestion: {question}\nAnswer:"
+
+
+def load_tokenizer(model):
+    try:
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(model)
+    except Exception as e:
+        logging.warning(f"Could not load the {model} tokenizer ({e}); estimating token counts")
+        return None
+
+
+class HFApiGenerator:
+    """
+    Hosted Hugging Face Inference API.
+    """
+
+    name = "hf-api"
+
+    def __init__(self, model=HF_API_MODEL, token=HF_API_TOKEN, temperature=0.6, max_input_tokens=MAX_INPUT_TOKENS):
+        self.url = f"https://api-inference.huggingface.co/models/{model}"
+        self.token = token
+        self.parameters = {"max_length": 300, "temperature": temperature}
+        self.max_input_tokens = max_input_tokens
+        self.counter = TokenCounter(load_tokenizer(model))  # The hosted model's own tokenizer, run locally
+
+    def generate(self, prompts):
+        answers = []
+        for prompt in prompts:
+            response = http_client.post(
+                self.url,
+                headers={"Authorization": f"Bearer {self.token}"},
+                json={"inputs": prompt, "parameters": self.parameters},
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"API Error: {response.status_code}, {response.text}")
+            answers.append(response.json()[0]["generated_text"])
+        return answers
+
+    def stream(self, prompt):
+        yield from stream_hf_generation(self.url, self.token, prompt, self.parameters)
+
+
+class LocalGenerator:
+    """
+    Runs a seq2seq model such as flan-t5 in-process on CPU, with batched generation.
+    `backend` is "torch", "quantized" (dynamic int8 quantization of the linear layers) or "onnx"
+    (needs optimum[onnxruntime]; falls back to quantized torch when it is missing).
+    """
+
+    name = "local"
+
+    def __init__(self, model=LOCAL_MODEL, backend=LOCAL_BACKEND, max_new_tokens=MAX_NEW_TOKENS,
+                 batch_size=GENERATE_BATCH_SIZE, max_input_tokens=MAX_INPUT_TOKENS):
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model)
+        self.model = self._load(model, backend)
+        self.max_new_tokens = max_new_tokens
+        self.batch_size = batch_size
+        self.max_input_tokens = max_input_tokens
+        self.counter = TokenCounter(self.tokenizer)
+
+    @staticmethod
+    def _load(model, backend):
+        if backend == "onnx":
+            try:
+                from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+                return ORTModelForSeq2SeqLM.from_pretrained(model, export=True)
+            except Exception as e:
+                logging.warning(f"Could not load {model} with ONNX Runtime ({e}); using quantized torch")
+                backend = "quantized"
+
+        import torch
+        from transformers import AutoModelForSeq2SeqLM
+
+        seq2seq = AutoModelForSeq2SeqLM.from_pretrained(model).eval()
+        if backend == "quantized":
+            torch.quantization.quantize_dynamic(seq2seq, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        return seq2seq
+
+    def _inputs(self, prompts):
+        return self.tokenizer(prompts, return_tensors="pt", padding=True, truncation=True, max_length=self.max_input_tokens)
+
+    def generate(self, prompts):
+        import torch
+
+        answers = []
+        for start in range(0, len(prompts), self.batch_size):
+            with torch.inference_mode():
+                output = self.model.generate(
+                    **self._inputs(prompts[start:start + self.batch_size]), max_new_tokens=self.max_new_tokens
+                )
+            answers.extend(self.tokenizer.batch_decode(output, skip_special_tokens=True))
+        return answers
+
+    def stream(self, prompt):
+        import torch
+        from transformers import TextIteratorStreamer
+
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=STREAM_TIMEOUT)
+        errors = []
+
+        def run():
+            try:
+                with torch.inference_mode():
+                    self.model.generate(**self._inputs([prompt]), max_new_tokens=self.max_new_tokens, streamer=streamer)
+            except Exception as e:
+                errors.append(e)
+                streamer.end()  # Unblock the consumer; the error is re-raised there
+
+        threading.Thread(target=run, daemon=True).start()
+        try:
+            yield from streamer
+        except queue.Empty:
+            raise TimeoutError(f"No tokens from {self.name} generator for {STREAM_TIMEOUT:.0f}s") from None
+        if errors:
+            raise errors[0]
+
+
+class StubGenerator:
+    """
+    Deterministic offline generator for tests and benchmarks: answers with the context sentence
+    that shares the most words with the question.
+    """
+
+    name = "stub"
+    max_input_tokens = MAX_INPUT_TOKENS
+    counter = TokenCounter()
+
+    def _answer(self, prompt):
+        context, _, question = prompt.partition("\n\nQuestion: ")
+        context = context[len("Context: "):]
+        question_words = set(re.findall(r"\w+", question.lower()))
+        sentences = re.split(r"(?<=[.!?])\s+", context.strip()) or [""]
+        return max(sentences, key=lambda sentence: len(question_words & set(re.findall(r"\w+", sentence.lower()))))
+
+    def generate(self, prompts):
+        return [self._answer(prompt) for prompt in prompts]
+
+    def stream(self, prompt):
+        words = self._answer(prompt).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == 0 else f" {word}"
+
+
+GENERATORS = {"hf-api": HFApiGenerator, "local": LocalGenerator, "stub": StubGenerator}
+
+
+def get_generator(name=GENERATOR, **options):
+    """
+    Returns the process-wide generator for a provider name and options, creating it on first use.
+    """
+    if name not in GENERATORS:
+        raise ValueError(f"Unknown generator '{name}', expected one of {tuple(GENERATORS)}")
+    key = (name, tuple(sorted(options.items())))
+    with _lock:
+        if key not in _generators:
+            logging.info(f"Loading {name} answer generator...")
+            _generators[key] = GENERATORS[name](**options)
+        return _generators[key]
+
+
+def generate_answers(generator, contexts, questions):
+    """
+    Answers each question from its context in one batched call; questions without context get "".
+    """
+    pending = [i for i, context in enumerate(contexts) if context]
+    answers = [""] * len(questions)
+    with telemetry.span(f"generate.{generator.name}", items=len(pending)):
+        generated = generator.generate([build_prompt(contexts[i], questions[i]) for i in pending])
+    for i, answer in zip(pending, generated):
+        answers[i] = answer
+    return answers
+
+
+def stream_answer(generator, context, question):
+    """
+    Yields an answer as it is generated.
+    """
+    yield from generator.stream(build_prompt(context, question))
@@ -0,0 +1,189 @@
+import os
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import telemetry
+
+# Client configuration
+REQUEST_TIMEOUT = 30  # Seconds per attempt
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5  # Seconds, doubled on every retry
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_SIZE = 20  # Keep-alive connections per host
+
+# Maximum in-flight requests per host
+HOST_CONCURRENCY = {
+    "google.serper.dev": 8,
+    "huggingface.co": 4,
+    "api-inference.huggingface.co": 4,
+    "api.github.com": 2,
+}
+DEFAULT_HOST_CONCURRENCY = 8
+
+# Provider hosts redirected to another base URL, e.g. a local stand-in server for offline benchmarks:
+# "google.serper.dev=http://127.0.0.1:8900/serper,api.github.com=http://127.0.0.1:8900/github"
+BASE_URL_OVERRIDES = dict(
+    item.strip().split("=", 1) for item in os.getenv("PROVIDER_BASE_URLS", "").split(",") if "=" in item
+)
+
+# Circuit breaker: stop calling a host after repeated failures, then probe again after a cooldown
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised when a host's circuit breaker is open and requests are short-circuited."""
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures (5xx responses and connection errors, not 429s) for one host.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Returns True if a request may be sent. After the cooldown one probe request is let through.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                self.opened_at = time.monotonic()  # Half-open: allow this probe, hold the rest
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+_session = None
+_session_lock = threading.Lock()
+_host_slots = {}
+_breakers = {}
+_host_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns the shared keep-alive session used by all provider clients.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _host_state(host):
+    with _host_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY))
+            _breakers[host] = CircuitBreaker()
+        return _host_slots[host], _breakers[host]
+
+
+def retry_delay(attempt, response=None):
+    """
+    Returns how long to wait before the next attempt, honoring a Retry-After header when present.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), BACKOFF_MAX)
+            except ValueError:
+                try:
+                    wait = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(max(wait, 0.0), BACKOFF_MAX)
+                except (TypeError, ValueError):
+                    pass
+    delay = min(BACKOFF_BASE * (2 ** attempt), BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)  # Jitter so parallel callers don't retry in lockstep
+
+
+def request(method, url, max_retries=MAX_RETRIES, timeout=REQUEST_TIMEOUT, **kwargs):
+    """
+    Sends a request through the shared session, retrying throttled and failed attempts with backoff.
+    Returns the last response (callers still call `raise_for_status`) or raises the last connection error.
+    Each call is traced as an "http.<host>" span with its retries, status and response size.
+    """
+    host = urlparse(url).netloc
+    if host in BASE_URL_OVERRIDES:
+        url = BASE_URL_OVERRIDES[host].rstrip("/") + url.split(host, 1)[1]
+    with telemetry.span(f"http.{host}", method=method) as span:
+        response = _request(method, url, host, max_retries, timeout, span, **kwargs)
+        span.set(status=response.status_code)
+        if kwargs.get("stream"):
+            span.add("bytes", int(response.headers.get("Content-Length") or 0))
+        else:
+            span.add("bytes", len(response.content))
+        return response
+
+
+def _request(method, url, host, max_retries, timeout, span, **kwargs):
+    slots, breaker = _host_state(host)
+    response = None
+    error = None
+
+    for attempt in range(max_retries + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {host} after repeated failures")
+
+        response, error = None, None
+        with slots:
+            try:
+                response = get_session().request(method, url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+
+        if response is not None and response.status_code not in RETRY_STATUSES:
+            breaker.record_success()
+            return response
+
+        if response is None or response.status_code != 429:
+            # Throttling is backed off via Retry-After and doesn't mean the host is down
+            breaker.record_failure()
+        if attempt < max_retries:
+            span.add("retries")
+            delay = retry_delay(attempt, response)
+            reason = response.status_code if response is not None else error
+            logging.warning(f"Retrying {method} {host} in {delay:.1f}s (attempt {attempt + 1}, {reason})")
+            time.sleep(delay)
+
+    if response is not None:
+        return response
+    raise error
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
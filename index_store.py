@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+
+import faiss
+import numpy as np
+
+# Where persisted indexes live; one subdirectory per key
+INDEX_STORE_DIR = os.getenv("INDEX_STORE_DIR", os.path.join(".cache", "indexes"))
+
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.json"
+
+
+def index_key(pdf_bytes, model_name, chunk_params):
+    """
+    Hashes the PDF bytes together with the embedding model and chunking parameters.
+    """
+    digest = hashlib.sha256()
+    digest.update(hashlib.sha256(pdf_bytes).digest())
+    digest.update(json.dumps({"model": model_name, "chunking": chunk_params}, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_index(key, store_dir=INDEX_STORE_DIR):
+    """
+    Loads a persisted index. Returns (index, chunks, embeddings) with the embeddings memory-mapped,
+    or None if nothing is stored under `key`.
+    """
+    path = os.path.join(store_dir, key)
+    if not os.path.exists(os.path.join(path, METADATA_FILE)):
+        return None
+    try:
+        index = faiss.read_index(os.path.join(path, INDEX_FILE))
+        with open(os.path.join(path, CHUNKS_FILE), "r", encoding="utf-8") as file:
+            chunks = json.load(file)
+        embeddings = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode="r")
+        return index, chunks, embeddings
+    except Exception as e:
+        logging.error(f"Error loading stored index {key}: {e}")
+        return None
+
+
+def save_index(key, index, chunks, embeddings, metadata=None, store_dir=INDEX_STORE_DIR):
+    """
+    Persists an index, its chunk texts and embedding matrix under `key`.
+    Files are written to a temporary directory first so readers never see a partial entry.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=store_dir, prefix=".tmp-")
+    try:
+        faiss.write_index(index, os.path.join(staging, INDEX_FILE))
+        with open(os.path.join(staging, CHUNKS_FILE), "w", encoding="utf-8") as file:
+            json.dump(chunks, file)
+        np.save(os.path.join(staging, EMBEDDINGS_FILE), np.asarray(embeddings, dtype="float32"))
+        with open(os.path.join(staging, METADATA_FILE), "w", encoding="utf-8") as file:
+            json.dump(dict(metadata or {}, num_chunks=len(chunks), created_at=time.time()), file, indent=4)
+
+        target = os.path.join(store_dir, key)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def load_or_build_index(pdf_bytes, model_name, chunk_params, build, store_dir=INDEX_STORE_DIR):
+    """
+    Returns (index, chunks, embeddings) for a PDF, calling `build()` and persisting its result
+    only when no index is stored for this PDF, model and chunking configuration.
+    """
+    key = index_key(pdf_bytes, model_name, chunk_params)
+    stored = load_index(key, store_dir)
+    if stored is not None:
+        logging.info(f"Loaded stored index {key[:12]}")
+        return stored
+
+    index, chunks, embeddings = build()
+    try:
+        save_index(key, index, chunks, embeddings, {"model": model_name, "chunking": chunk_params}, store_dir)
+    except Exception as e:
+        logging.error(f"Error saving index {key[:12]}: {e}")
+    return index, chunks, embeddings
@@ -0,0 +1,452 @@
+import os
+import csv
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import sys
+import logging
+import argparse
+import threading
+import traceback
+from contextlib import contextmanager
+
+import telemetry
+
+# Queue and worker settings
+JOBS_DB = os.getenv("JOBS_DB", "jobs.db")
+JOBS_DIR = os.getenv("JOBS_DIR", "job_runs")  # One workspace per job: <JOBS_DIR>/<job id>/
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_RUNNER = os.getenv("JOB_RUNNER", "pipeline")
+POLL_INTERVAL = 0.5  # Seconds an idle worker waits before checking the queue again
+HEARTBEAT_INTERVAL = 15  # Seconds between heartbeats for running jobs
+STALE_AFTER = 120  # Running jobs without a heartbeat for this long are taken back from a dead worker
+MAX_ATTEMPTS = 2
+STUB_LATENCY_SCALE = float(os.getenv("JOB_STUB_LATENCY_SCALE", "0.1"))  # Stand-in provider latency relative to the real APIs
+STAND_IN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+
+STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    runner TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    workspace TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    heartbeat_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    A persistent job queue in SQLite, shared by the Streamlit app, the CLI and any number of worker
+    processes. Each operation opens its own short-lived connection, so one queue can be used from many
+    threads. Jobs are claimed in submission order inside an immediate transaction, so two workers
+    never run the same job.
+    """
+
+    def __init__(self, path=JOBS_DB):
+        self.path = path
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    @staticmethod
+    def _decode(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(self, params, runner=JOB_RUNNER):
+        """
+        Queues a job for `runner` (a key of RUNNERS) and returns its id.
+        """
+        if runner not in RUNNERS:
+            raise ValueError(f"Unknown job runner '{runner}'. Choose from: {', '.join(RUNNERS)}")
+        job_id = uuid.uuid4().hex[:12]
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO jobs (id, runner, params, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, runner, json.dumps(params), time.time()),
+            )
+        return job_id
+
+    def claim(self, worker, runner=None):
+        """
+        Marks the oldest queued job (of `runner`, if given) as running on `worker` and returns it, or None
+        if there is none.
+        """
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND (? IS NULL OR runner = ?) ORDER BY created_at LIMIT 1",
+                (runner, runner),
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            connection.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, started_at = ?, "
+                "heartbeat_at = ?, progress = 0, message = NULL, error = NULL WHERE id = ?",
+                (worker, now, now, row["id"]),
+            )
+            return self._decode(connection.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+    def update(self, job_id, progress=None, message=None, workspace=None):
+        """
+        Records progress (0 to 1), a status message or the workspace of a running job; also a heartbeat.
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET progress = COALESCE(?, progress), message = COALESCE(?, message), "
+                "workspace = COALESCE(?, workspace), heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                (progress, message, workspace, time.time(), job_id),
+            )
+
+    def heartbeat(self, job_ids):
+        with self._connect() as connection:
+            connection.executemany(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                [(time.time(), job_id) for job_id in job_ids],
+            )
+
+    def finish(self, job_id, result):
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = 'succeeded', progress = 1, message = 'Done', result = ?, finished_at = ? "
+                "WHERE id = ? AND status = 'running'",
+                (json.dumps(result), time.time(), job_id),
+            )
+
+    def fail(self, job_id, error):
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ? AND status = 'running'",
+                (error, time.time(), job_id),
+            )
+
+    def cancel(self, job_id):
+        """
+        Cancels a job that hasn't started yet. Returns True if it was cancelled.
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+            return cursor.rowcount == 1
+
+    def requeue_stale(self, stale_after=STALE_AFTER, max_attempts=MAX_ATTEMPTS):
+        """
+        Takes back running jobs whose worker stopped sending heartbeats: they are queued again, or failed
+        once they have used up their attempts. Returns the number of jobs taken back.
+        """
+        cutoff = time.time() - stale_after
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Worker stopped responding', finished_at = ? "
+                "WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+                (time.time(), cutoff, max_attempts),
+            )
+            cursor = connection.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, message = 'Requeued after worker failure' "
+                "WHERE status = 'running' AND heartbeat_at < ?",
+                (cutoff,),
+            )
+            return cursor.rowcount
+
+    def get(self, job_id):
+        with self._connect() as connection:
+            return self._decode(connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list_jobs(self, job_ids=None, status=None, limit=50):
+        """
+        Returns the most recent jobs, optionally only the given ids or those with one status.
+        """
+        query, args = "SELECT * FROM jobs WHERE 1 = 1", []
+        if job_ids is not None:
+            query += f" AND id IN ({', '.join('?' * len(job_ids))})"
+            args += list(job_ids)
+        if status is not None:
+            query += " AND status = ?"
+            args.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        with self._connect() as connection:
+            return [self._decode(row) for row in connection.execute(query, args)]
+
+    def counts(self):
+        with self._connect() as connection:
+            counts = dict(connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+
+def run_pipeline_job(params, workspace, report):
+    """
+    Runs the full agent pipeline for one company in the job's workspace, with stage artifacts written
+    as checkpoints so they can be downloaded. `report(progress, message)` records progress.
+    """
+    if _stand_in["url"] is not None:
+        raise RuntimeError("This worker routes provider calls to the stand-in server; run real jobs on another worker")
+    return _run_pipeline(params, workspace, report)
+
+
+def _run_pipeline(params, workspace, report):
+    import pipeline  # Imported here so the queue can be used without the agents' dependencies
+
+    def on_stage(name, done, total):
+        report(done / total, f"Finished {name} ({done}/{total})")
+
+    result = pipeline.run_pipeline(
+        params["industry"], params["company"], output_dir=workspace, checkpoints=True, incremental=False,
+        on_stage=on_stage,
+    )
+    company_dir = os.path.dirname(result.report_path)
+    artifacts = ["research_output.json", "use_cases.json", "use_cases.md", "resources.md"]
+    return {
+        "report_path": result.report_path,
+        "artifacts": {name: os.path.join(company_dir, name) for name in artifacts
+                      if os.path.exists(os.path.join(company_dir, name))},
+        "timings": result.timings,
+    }
+
+
+_stand_in = {"url": None}
+_stand_in_lock = threading.Lock()
+
+
+def use_stand_in_providers(jobs_dir=JOBS_DIR, latency_scale=STUB_LATENCY_SCALE):
+    """
+    Routes this process's provider calls to the local stand-in server (benchmarks/stand_in_server.py),
+    starting it on first use, with its own response cache under `jobs_dir`. The agents' clients read
+    their routing when they are created, so this must run before the agents are imported.
+    Returns the server's URL.
+    """
+    with _stand_in_lock:
+        if _stand_in["url"] is None:
+            loaded = [name for name in ("pipeline", "1_research", "2_usecase", "3_asset", "response_cache") if name in sys.modules]
+            if loaded:
+                raise RuntimeError(
+                    f"The stub runner needs a worker that hasn't run real jobs ({', '.join(loaded)} already loaded)"
+                )
+            sys.path.insert(0, STAND_IN_DIR)
+            from stand_in_server import environment, start_server
+            import http_client
+
+            _, url = start_server(latency_scale=latency_scale)
+            os.environ.update(environment(url), RESPONSE_CACHE_PATH=os.path.join(jobs_dir, "stand_in_responses.sqlite3"))
+            http_client.BASE_URL_OVERRIDES.update(
+                item.split("=", 1) for item in os.environ["PROVIDER_BASE_URLS"].split(",")
+            )
+            _stand_in["url"] = url
+            logger.info(f"Provider calls routed to the stand-in server at {url}")
+        return _stand_in["url"]
+
+
+def run_stub_job(params, workspace, report):
+    """
+    Runs the real pipeline job against the local stand-in server, which replays recorded provider
+    responses with scaled latency (JOB_STUB_LATENCY_SCALE). Exercises the queue, workers, pipeline
+    and UI offline without API keys.
+    """
+    use_stand_in_providers(os.path.dirname(workspace))
+    return _run_pipeline(params, workspace, report)
+
+
+RUNNERS = {
+    "pipeline": run_pipeline_job,
+    "stub": run_stub_job,
+}
+
+
+class WorkerPool:
+    """
+    Worker threads that claim jobs from a queue and run each in its own workspace under `jobs_dir`, so
+    concurrent runs never share files. Pipeline runs spend their time waiting on provider calls, so
+    threads suffice, and they share the process-wide HTTP connection pools and per-host limits.
+    A supervisor thread sends heartbeats for running jobs and takes back jobs abandoned by dead workers.
+    With `runner`, only jobs for that runner are claimed (stub jobs need a process of their own).
+    """
+
+    def __init__(self, queue, workers=JOB_WORKERS, jobs_dir=JOBS_DIR, runner=None):
+        self.queue = queue
+        self.workers = workers
+        self.jobs_dir = jobs_dir
+        self.runner = runner
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.running = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self.queue.requeue_stale()
+        self._threads = [
+            threading.Thread(target=self._work, args=(f"{self.name}:{i}",), name=f"job-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        self._threads.append(threading.Thread(target=self._supervise, name="job-supervisor", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Started {self.workers} job workers ({self.name})")
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Stops claiming new jobs and waits for the running ones to finish.
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _work(self, worker):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(worker, self.runner)
+            except sqlite3.Error as e:
+                logger.error(f"Error claiming job: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(POLL_INTERVAL)
+                continue
+            self.run_job(job)
+
+    def run_job(self, job):
+        workspace = os.path.join(self.jobs_dir, job["id"])
+        os.makedirs(workspace, exist_ok=True)
+        with self._lock:
+            self.running.add(job["id"])
+        self.queue.update(job["id"], progress=0.0, message="Started", workspace=workspace)
+        start = time.perf_counter()
+        try:
+            with telemetry.span(f"job.{job['runner']}", job=job["id"]):
+                result = RUNNERS[job["runner"]](
+                    job["params"], workspace,
+                    lambda progress, message: self.queue.update(job["id"], progress=progress, message=message),
+                )
+            result["seconds"] = time.perf_counter() - start
+            self.queue.finish(job["id"], result)
+            logger.info(f"Job {job['id']} succeeded in {result['seconds']:.1f}s")
+        except Exception as e:
+            with open(os.path.join(workspace, "error.log"), "w", encoding="utf-8") as file:
+                file.write(traceback.format_exc())
+            self.queue.fail(job["id"], f"Error running job: {e}")
+            logger.error(f"Job {job['id']} failed: {e}")
+        finally:
+            with self._lock:
+                self.running.discard(job["id"])
+
+    def _supervise(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                with self._lock:
+                    running = list(self.running)
+                self.queue.heartbeat(running)
+                taken_back = self.queue.requeue_stale()
+                if taken_back:
+                    logger.warning(f"Requeued {taken_back} jobs abandoned by stopped workers")
+            except sqlite3.Error as e:
+                logger.error(f"Error sending job heartbeats: {e}")
+
+
+def format_job(job):
+    line = f"{job['id']}  {job['status']:<9} {job['progress']:>4.0%}  {job['params'].get('company', '')}"
+    if job["message"] and job["status"] == "running":
+        line += f"  {job['message']}"
+    if job["error"]:
+        line += f"  {job['error']}"
+    if job["result"]:
+        line += f"  {job['result'].get('report_path')}"
+    return line
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run pipeline jobs from a persistent queue")
+    parser.add_argument("--db", default=JOBS_DB, help="SQLite queue database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker_parser = commands.add_parser("worker", help="Run a pool of workers until interrupted")
+    worker_parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="Jobs run at once")
+    worker_parser.add_argument("--jobs-dir", default=JOBS_DIR, help="Directory for per-job workspaces")
+    worker_parser.add_argument("--runner", choices=sorted(RUNNERS), help="Only run jobs for this runner")
+
+    submit_parser = commands.add_parser("submit", help="Queue pipeline runs")
+    submit_parser.add_argument("--industry", help="Industry to research")
+    submit_parser.add_argument("--company", help="Company name")
+    submit_parser.add_argument("--batch", help="CSV file of industry,company rows")
+    submit_parser.add_argument("--runner", default=JOB_RUNNER, choices=sorted(RUNNERS), help="Job runner")
+
+    status_parser = commands.add_parser("status", help="Show recent jobs or one job")
+    status_parser.add_argument("job_id", nargs="?")
+
+    cancel_parser = commands.add_parser("cancel", help="Cancel a queued job")
+    cancel_parser.add_argument("job_id")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.db)
+    if args.command == "worker":
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+        telemetry.start_run("jobs")
+        pool = WorkerPool(queue, args.workers, args.jobs_dir, args.runner).start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("Stopping workers after their current jobs...")
+            pool.stop()
+    elif args.command == "submit":
+        if args.batch:
+            with open(args.batch, "r", encoding="utf-8", newline="") as file:
+                pairs = [(row[0].strip(), row[1].strip()) for row in csv.reader(file) if len(row) >= 2 and row[0].strip()]
+        else:
+            pairs = [(args.industry or input("Enter the industry to research: "),
+                      args.company or input("Enter the company name: "))]
+        for industry, company in pairs:
+            print(f"Queued {queue.submit({'industry': industry, 'company': company}, args.runner)} for {company}")
+    elif args.command == "status":
+        if args.job_id:
+            job = queue.get(args.job_id)
+            print(json.dumps(job, indent=2) if job else f"No job {args.job_id}")
+        else:
+            print(", ".join(f"{count} {status}" for status, count in queue.counts().items()))
+            for job in queue.list_jobs():
+                print(format_job(job))
+    elif args.command == "cancel":
+        print("Cancelled." if queue.cancel(args.job_id) else "Only queued jobs can be cancelled.")
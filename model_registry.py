@@ -0,0 +1,73 @@
+import os
+import logging
+import threading
+
+# Embedding backend: "torch" (default), "onnx" or "openvino" (need the matching sentence-transformers
+# extras installed), or "quantized" for dynamic int8 quantization of the torch model on CPU
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_BACKENDS = ("torch", "onnx", "openvino", "quantized")
+
+_models = {}
+_lock = threading.Lock()
+
+
+def model_key(name, backend=EMBEDDING_BACKEND):
+    """
+    Identifies a model and backend; stored indexes are keyed on it because backends embed slightly differently.
+    """
+    return name if backend == "torch" else f"{name}@{backend}"
+
+
+def _load(name, backend, device):
+    from sentence_transformers import SentenceTransformer
+
+    if backend in ("onnx", "openvino"):
+        try:
+            return SentenceTransformer(name, device=device, backend=backend)
+        except Exception as e:
+            logging.warning(f"Could not load {name} with the {backend} backend ({e}); using torch")
+            return SentenceTransformer(name, device=device)
+
+    model = SentenceTransformer(name, device="cpu" if backend == "quantized" else device)
+    if backend == "quantized":
+        import torch
+
+        torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def get_embedding_model(name, backend=EMBEDDING_BACKEND, device=None):
+    """
+    Returns the process-wide instance of a SentenceTransformer model, loading it on first use.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
+    key = (name, backend, device)
+    with _lock:
+        if key not in _models:
+            logging.info(f"Loading embedding model {model_key(name, backend)}...")
+            _models[key] = _load(name, backend, device)
+        return _models[key]
+
+
+def get_cross_encoder(name, device=None):
+    """
+    Returns the process-wide instance of a CrossEncoder reranking model, loading it on first use.
+    """
+    key = ("cross-encoder", name, device)
+    with _lock:
+        if key not in _models:
+            from sentence_transformers import CrossEncoder
+
+            logging.info(f"Loading reranker {name}...")
+            _models[key] = CrossEncoder(name, device=device)
+        return _models[key]
+
+
+def warm_up(name, backend=EMBEDDING_BACKEND, device=None):
+    """
+    Loads a model and runs one encode call so the first real query doesn't pay for lazy initialization.
+    """
+    model = get_embedding_model(name, backend, device)
+    model.encode(["warm up"])
+    return model
@@ -0,0 +1,363 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import importlib
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import report_render
+import telemetry
+
+# The agent scripts have numeric prefixes, so they are imported by name
+research_agent = importlib.import_module("1_research")
+use_case_agent = importlib.import_module("2_usecase")
+asset_agent = importlib.import_module("3_asset")
+report_agent = importlib.import_module("4_report")
+
+# Runner settings
+STAGE_CONCURRENCY = 4  # Stages of one pipeline run in flight at once
+PIPELINE_CONCURRENCY = 2  # Companies processed at once in batch mode
+OUTPUT_DIR = "pipeline_runs"
+REPORT_FILE = "GenAI_Summary_Report.pdf"
+STAGE_STORE_DIR = ".stages"  # Per-workspace record of each stage's fingerprint and output
+
+
+@dataclass
+class ResearchData:
+    industry_trends: list
+    competitors: list
+    ai_insights: str
+    company_details: dict
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass
+class Resources:
+    use_cases: list  # Use case titles, in report order
+    datasets: dict  # Use case title -> dataset links
+    markdown: str
+
+
+@dataclass
+class PipelineResult:
+    industry: str
+    company: str
+    research: ResearchData
+    use_cases: list  # UseCase objects
+    resources: Resources
+    report_path: str
+    timings: dict = field(default_factory=dict)  # Stage name -> seconds
+    skipped: list = field(default_factory=list)  # Stages reused from a previous run
+
+
+def _identity(value):
+    return value
+
+
+@dataclass
+class Stage:
+    """
+    One step of the pipeline. `func` receives the outputs of `deps` as keyword arguments.
+
+    `params` holds everything besides the dependencies that determines the output (inputs, prompt/model
+    settings, a hash of the code); `encode`/`decode` convert the output to and from JSON for the stage
+    store, and `check` rejects outputs that must not be reused, e.g. error results or a deleted report.
+    `save` writes the output's artifacts (checkpoint files); it runs whether the stage ran or was reused.
+    """
+    name: str
+    func: object
+    deps: tuple = ()
+    params: dict = field(default_factory=dict)
+    encode: object = _identity
+    decode: object = _identity
+    check: object = None
+    save: object = None
+
+
+def succeeded(output):
+    """
+    The agents report failures as "Error ..." strings instead of raising; such outputs are never reused.
+    """
+    if isinstance(output, str):
+        return not output.startswith("Error")
+    if isinstance(output, list):
+        return all(succeeded(item) for item in output if isinstance(item, str))
+    if isinstance(output, dict):
+        return succeeded(str(output.get("description", "")))
+    return True
+
+
+def content_hash(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def source_hash(module):
+    """
+    Hashes a module's source so editing an agent invalidates the stages that use it.
+    """
+    with open(module.__file__, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def stage_fingerprint(stage, output_hashes):
+    """
+    Fingerprints a stage from its name, parameters and the content of its dependencies' outputs.
+    """
+    return content_hash({
+        "stage": stage.name,
+        "params": stage.params,
+        "deps": {dep: output_hashes[dep] for dep in stage.deps},
+    })
+
+
+class StageStore:
+    """
+    Stores each stage's last fingerprint and JSON-encoded output in a directory, one file per stage.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    def load(self, name, fingerprint):
+        """
+        Returns the stored record for a stage if it was produced with the same fingerprint.
+        """
+        try:
+            with open(self._path(name), "r", encoding="utf-8") as file:
+                record = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return record if record.get("fingerprint") == fingerprint else None
+
+    def save(self, name, fingerprint, output_hash, output):
+        temp_path = self._path(name) + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"fingerprint": fingerprint, "output_hash": output_hash, "output": output}, file)
+        os.replace(temp_path, self._path(name))
+
+
+def _run_stage(stage, inputs, cached):
+    start = time.perf_counter()
+    with telemetry.span(f"stage.{stage.name}", cache=cached):
+        output = stage.func(**inputs)
+    return output, time.perf_counter() - start
+
+
+def run_stages(stages, max_workers=STAGE_CONCURRENCY, store=None, force=(), on_stage=None):
+    """
+    Runs a dependency graph of stages in one process, starting each stage as soon as all of its
+    dependencies have finished. Returns (outputs, timings, skipped), keyed by stage name.
+    `on_stage(name, done, total)` is called as each stage finishes or is reused, e.g. to report progress.
+
+    With a `store`, a stage whose fingerprint matches its stored record is not run again; its stored
+    output is reused. Because fingerprints cover the content of dependency outputs, only stages
+    downstream of an actual change are recomputed. Stages named in `force` always run. Outputs that
+    fail their `check`, or that were built from a dependency that failed its check, are not stored.
+    """
+    pending = {stage.name: stage for stage in stages}
+    outputs, timings, running = {}, {}, {}
+    output_hashes, skipped, rejected = {}, [], set()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = True
+            while ready:
+                ready = False
+                for name, stage in list(pending.items()):
+                    if not all(dep in outputs for dep in stage.deps):
+                        continue
+                    del pending[name]
+                    fingerprint = stage_fingerprint(stage, output_hashes)
+                    reusable = store is not None and name not in force and not any(dep in rejected for dep in stage.deps)
+                    record = store.load(name, fingerprint) if reusable else None
+                    if record is not None:
+                        output = stage.decode(record["output"])
+                        if stage.check is None or stage.check(output):
+                            outputs[name], output_hashes[name], timings[name] = output, record["output_hash"], 0.0
+                            skipped.append(name)
+                            if stage.save is not None:
+                                stage.save(output)
+                            telemetry.record(f"stage.{name}", 0.0, cache="hit")
+                            if on_stage is not None:
+                                on_stage(name, len(outputs), len(stages))
+                            ready = True  # Dependents of a reused stage may now be ready
+                            continue
+                    inputs = {dep: outputs[dep] for dep in stage.deps}
+                    cached = "miss" if store is not None and name not in force else None
+                    running[executor.submit(_run_stage, stage, inputs, cached)] = (stage, fingerprint)
+
+            if not running:
+                if pending:
+                    raise ValueError(f"Stages with unmet or cyclic dependencies: {', '.join(pending)}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, fingerprint = running.pop(future)
+                output, timings[stage.name] = future.result()
+                encoded = stage.encode(output)
+                outputs[stage.name], output_hashes[stage.name] = output, content_hash(encoded)
+                if stage.save is not None:
+                    stage.save(output)
+                if (stage.check is not None and not stage.check(output)) or any(dep in rejected for dep in stage.deps):
+                    rejected.add(stage.name)
+                elif store is not None:
+                    store.save(stage.name, fingerprint, output_hashes[stage.name], encoded)
+                if on_stage is not None:
+                    on_stage(stage.name, len(outputs), len(stages))
+
+    return outputs, timings, skipped
+
+
+def build_stages(industry, company, workspace, checkpoints=False, report_date=None):
+    """
+    Builds the research -> use cases -> assets -> report graph for one company.
+    The four research lookups run in parallel, and the Cohere insights call overlaps use case generation.
+    With `checkpoints`, each stage's artifact is also written to `workspace`, including for reused stages.
+    """
+    def checkpoint(name):
+        return os.path.join(workspace, name)
+
+    def research(industry_trends, competitors, ai_insights, company_details):
+        return ResearchData(industry_trends, competitors, ai_insights, company_details)
+
+    def save_research(data):
+        research_agent.save_research_data(data.to_dict(), checkpoint("research_output.json"))
+
+    def use_cases(industry_trends, competitors, company_details):
+        return use_case_agent.generate_structured_use_cases(
+            industry_trends, company_details["description"], competitors, industry=industry, company_name=company
+        )
+
+    def save_use_cases(generated):
+        use_case_agent.save_use_cases_to_json(generated, checkpoint("use_cases.json"))
+        use_case_agent.save_use_cases_to_markdown(
+            use_case_agent.format_use_cases_markdown(generated), checkpoint("use_cases.md")
+        )
+
+    def resources(use_cases):
+        titles = [use_case.title for use_case in use_cases]
+        datasets = asset_agent.find_resources(titles, [use_case.problem for use_case in use_cases])
+        return Resources(titles, datasets, asset_agent.format_resources_markdown(titles, datasets))
+
+    def save_resources(resources):
+        asset_agent.save_resources_to_markdown(resources.use_cases, resources.datasets, checkpoint("resources.md"))
+
+    report_path = os.path.join(workspace, REPORT_FILE)
+    report_date = report_date or report_agent.report_date()
+
+    def report(research, use_cases, resources):
+        return report_agent.build_report(
+            research.to_dict(),
+            use_case_agent.format_use_cases_markdown(use_cases),
+            resources.markdown,
+            output_path=report_path,
+            date=report_date,
+        )
+
+    research_code = source_hash(research_agent)
+    return [
+        Stage("industry_trends", lambda: research_agent.fetch_industry_trends(industry),
+              params={"industry": industry, "code": research_code}, check=succeeded),
+        Stage("competitors", lambda: research_agent.fetch_competitors(company),
+              params={"company": company, "code": research_code}, check=succeeded),
+        Stage("ai_insights", lambda: research_agent.fetch_insights_with_cohere(industry),
+              params={"industry": industry, "code": research_code}, check=succeeded),
+        Stage("company_details", lambda: research_agent.fetch_company_details(company),
+              params={"company": company, "code": research_code}, check=succeeded),
+        Stage("research", research, ("industry_trends", "competitors", "ai_insights", "company_details"),
+              encode=ResearchData.to_dict, decode=lambda data: ResearchData(**data),
+              save=save_research if checkpoints else None),
+        Stage("use_cases", use_cases, ("industry_trends", "competitors", "company_details"),
+              params={"industry": industry, "company": company, "code": source_hash(use_case_agent)},
+              encode=lambda items: [asdict(item) for item in items],
+              decode=lambda items: [use_case_agent.UseCase(**item) for item in items],
+              check=lambda items: bool(items) and all(succeeded(list(asdict(item).values())) for item in items),
+              save=save_use_cases if checkpoints else None),
+        Stage("resources", resources, ("use_cases",),
+              params={"code": source_hash(asset_agent)}, encode=asdict, decode=lambda data: Resources(**data),
+              check=lambda resources: all(succeeded(datasets) for datasets in resources.datasets.values()),
+              save=save_resources if checkpoints else None),
+        Stage("report", report, ("research", "use_cases", "resources"),
+              params={"path": report_path, "date": report_date, "code": source_hash(report_agent) + source_hash(report_render)},
+              check=os.path.exists),
+    ]
+
+
+def run_pipeline(industry, company, output_dir=OUTPUT_DIR, checkpoints=False, incremental=True, force=(), on_stage=None):
+    """
+    Runs the full pipeline for one company in-process, handing stage outputs over in memory.
+    The report (and any checkpoints) go to a per-company directory under `output_dir`.
+
+    When `incremental`, stage fingerprints and outputs are kept in the workspace and a rerun only
+    recomputes stages whose inputs, settings or code changed, plus those named in `force`.
+    `on_stage` is passed on to `run_stages`.
+    """
+    workspace = os.path.join(output_dir, research_agent.company_slug(company))
+    os.makedirs(workspace, exist_ok=True)
+
+    store = StageStore(os.path.join(workspace, STAGE_STORE_DIR)) if incremental else None
+    stages = build_stages(industry, company, workspace, checkpoints)
+    outputs, timings, skipped = run_stages(stages, store=store, force=force, on_stage=on_stage)
+    return PipelineResult(
+        industry=industry,
+        company=company,
+        research=outputs["research"],
+        use_cases=outputs["use_cases"],
+        resources=outputs["resources"],
+        report_path=outputs["report"],
+        timings=timings,
+        skipped=skipped,
+    )
+
+
+def run_pipelines(pairs, max_concurrency=PIPELINE_CONCURRENCY, output_dir=OUTPUT_DIR, checkpoints=False, incremental=True):
+    """
+    Runs the pipeline for many (industry, company) pairs. Returns results in input order, with None for failed runs.
+    """
+    def run(pair):
+        industry, company = pair
+        try:
+            result = run_pipeline(industry, company, output_dir, checkpoints, incremental)
+            print(f"Pipeline finished for {company}: {result.report_path}")
+            return result
+        except Exception as e:
+            print(f"Error running pipeline for {company}: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        return list(executor.map(run, pairs))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the research -> use cases -> assets -> report pipeline")
+    parser.add_argument("--industry", help="Industry to research")
+    parser.add_argument("--company", help="Company name")
+    parser.add_argument("--batch", help="CSV file of industry,company rows")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Directory for per-company reports")
+    parser.add_argument("--checkpoints", action="store_true", help="Also write each stage's artifact to disk")
+    parser.add_argument("--concurrency", type=int, default=PIPELINE_CONCURRENCY, help="Companies processed at once")
+    parser.add_argument("--full", action="store_true", help="Run every stage, ignoring results of previous runs")
+    parser.add_argument("--force", nargs="+", default=[], help="Stages to rerun even if their inputs are unchanged")
+    args = parser.parse_args()
+    telemetry.start_run("pipeline")
+
+    if args.batch:
+        pairs = research_agent.read_batch_file(args.batch)
+        run_pipelines(pairs, args.concurrency, args.output_dir, args.checkpoints, not args.full)
+    else:
+        industry = args.industry or input("Enter the industry to research: ")
+        company = args.company or input("Enter the company name: ")
+        result = run_pipeline(industry, company, args.output_dir, args.checkpoints, not args.full, args.force)
+        print(f"\nReport generated: {result.report_path}")
+        for name, seconds in result.timings.items():
+            status = "reused" if name in result.skipped else f"{seconds:6.2f}s"
+            print(f"  {name:<16} {status}")
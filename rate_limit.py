@@ -0,0 +1,73 @@
+import time
+import threading
+from collections import deque
+
+WINDOW_SECONDS = 60.0
+
+
+def estimate_tokens(text):
+    """
+    Rough token count for budgeting (about four characters per token for English text).
+    """
+    return max(1, len(text) // 4)
+
+
+def billed_tokens(response, prompt, completion):
+    """
+    Returns (input, output) tokens of a Cohere response from its billed units, estimated when absent.
+    """
+    billed = getattr(getattr(response, "meta", None), "billed_units", None)
+    return (
+        int(getattr(billed, "input_tokens", None) or estimate_tokens(prompt)),
+        int(getattr(billed, "output_tokens", None) or estimate_tokens(completion)),
+    )
+
+
+class RateLimiter:
+    """
+    Keeps API calls under a requests-per-minute and tokens-per-minute budget over a sliding one-minute window.
+    A limit of None or 0 disables that budget.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._calls = deque()  # (timestamp, tokens) for calls inside the window
+        self._tokens = 0
+        self._condition = threading.Condition()
+
+    def _expire(self, now):
+        while self._calls and now - self._calls[0][0] >= WINDOW_SECONDS:
+            self._tokens -= self._calls.popleft()[1]
+
+    def _wait_time(self, tokens, now):
+        if not self._calls:
+            return 0.0  # A single request larger than the token budget still goes through on its own
+        waits = []
+        if self.requests_per_minute and len(self._calls) >= self.requests_per_minute:
+            waits.append(self._calls[0][0] + WINDOW_SECONDS - now)
+        if self.tokens_per_minute and self._tokens + tokens > self.tokens_per_minute:
+            # Wait until enough of the oldest calls leave the window to make room
+            freed = self._tokens + tokens - self.tokens_per_minute
+            for timestamp, used in self._calls:
+                freed -= used
+                if freed <= 0:
+                    waits.append(timestamp + WINDOW_SECONDS - now)
+                    break
+        return max(waits, default=0.0)
+
+    def acquire(self, tokens=0):
+        """
+        Blocks until a call using `tokens` tokens fits in the budget, then records it. Returns seconds waited.
+        """
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    self._calls.append((now, tokens))
+                    self._tokens += tokens
+                    return now - start
+                self._condition.wait(wait)
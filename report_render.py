@@ -0,0 +1,298 @@
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+
+from fpdf import FPDF
+
+import telemetry
+
+# Process umask, read once at import (os.umask can only be read by setting it, which races with other threads)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Text styles: (font family, style, size in pt, line height in mm, RGB text color)
+STYLES = {
+    "section": ("Arial", "B", 14, 10, (0, 0, 0)),
+    "heading": ("Arial", "B", 12, 7, (0, 0, 0)),
+    "label": ("Arial", "B", 11, 6, (0, 0, 0)),
+    "body": ("Arial", "", 11, 6, (0, 0, 0)),
+    "link": ("Arial", "U", 11, 6, (0, 0, 255)),
+}
+BULLET_INDENT = 6  # mm
+
+# Core PDF fonts only cover Latin-1; common typographic characters from generated text are mapped to it
+LATIN1_REPLACEMENTS = str.maketrans({
+    "‘": "'", "’": "'", "“": '"', "”": '"', "–": "-", "—": "-",
+    "•": "-", "…": "...", " ": " ", "→": "->",
+})
+
+LINK_LINE = re.compile(r"^(.*?)\s+-\s+(https?://\S+)$")
+FIELD_LINE = re.compile(r"^\*\*(.+?)(?::\*\*|\*\*:)\s*(.*)$")
+
+
+def latin1(text):
+    return text.translate(LATIN1_REPLACEMENTS).encode("latin-1", "replace").decode("latin-1")
+
+
+@dataclass
+class Block:
+    kind: str  # "section", "heading", "paragraph", "field", "bullet" or "link"
+    text: str
+    label: str = None  # Bold lead-in of a field, e.g. "Problem"
+    url: str = None
+
+
+def parse_markdown(markdown):
+    """
+    Parses the Markdown written by the agents into blocks in one pass. Consecutive text lines form one
+    paragraph; "- name - url" lines become links. Top-level "# " titles are dropped since each
+    report section has its own title.
+    """
+    blocks, paragraph = [], []
+
+    def flush():
+        if paragraph:
+            blocks.append(Block("paragraph", " ".join(paragraph)))
+            paragraph.clear()
+
+    for line in markdown.splitlines():
+        line = line.strip()
+        if not line:
+            flush()
+        elif line.startswith("#"):
+            flush()
+            level = len(line) - len(line.lstrip("#"))
+            if level > 1:
+                blocks.append(Block("heading", line.lstrip("#").strip()))
+        elif line.startswith("- ") or line == "-":
+            flush()
+            item = line[1:].strip()
+            link = LINK_LINE.match(item)
+            blocks.append(Block("link", link.group(1), url=link.group(2)) if link else Block("bullet", item))
+        elif FIELD_LINE.match(line):
+            flush()
+            label, text = FIELD_LINE.match(line).groups()
+            blocks.append(Block("field", text, label=label))
+        else:
+            paragraph.append(line)
+    flush()
+    return blocks
+
+
+class StreamingBuffer:
+    """
+    Stands in for FPDF's in-memory output string: appends are written straight to a file while the
+    byte length FPDF uses for its object offsets is tracked. Avoids the quadratic string concatenation
+    of the default buffer and keeps memory flat for large reports.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.length = 0
+
+    def __iadd__(self, text):
+        data = text.encode("latin-1")
+        self.file.write(data)
+        self.length += len(data)
+        return self
+
+    def __len__(self):
+        return self.length
+
+
+class SpilledPages(dict):
+    """
+    FPDF's page contents with finished pages moved to a temporary file; only the page being drawn
+    stays in memory.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.file = tempfile.TemporaryFile()
+        self.offsets = {}  # page number -> (offset, length) in the spill file
+
+    def _spill(self, page):
+        data = dict.pop(self, page).encode("latin-1")
+        self.file.seek(0, os.SEEK_END)
+        self.offsets[page] = (self.file.tell(), len(data))
+        self.file.write(data)
+
+    def __setitem__(self, page, content):
+        if not dict.__contains__(self, page):
+            # A new page was started (or a spilled one rewritten): move the others out of memory
+            for finished in list(self.keys()):
+                self._spill(finished)
+            self.offsets.pop(page, None)
+        super().__setitem__(page, content)
+
+    def __getitem__(self, page):
+        if dict.__contains__(self, page):
+            return super().__getitem__(page)
+        offset, length = self.offsets[page]
+        self.file.seek(offset)
+        return self.file.read(length).decode("latin-1")
+
+    def __contains__(self, page):
+        return dict.__contains__(self, page) or page in self.offsets
+
+    def close(self):
+        self.file.close()
+
+
+class PDFReport(FPDF):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_compression(True)
+        self.style = None
+        self.set_auto_page_break(True, margin=20)
+
+    def header(self):
+        if self.page_no() == 1:
+            return  # No header on the first page (cover page)
+        self.set_font("Arial", "I", 10)
+        self.cell(0, 10, "AI & GenAI Use Case Report", align="C", ln=True)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font("Arial", "I", 8)
+        self.cell(0, 10, f"Page {self.page_no()}", align="C")
+
+    def add_cover_page(self, title, subtitle, date):
+        self.add_page()
+        self.set_font("Arial", "B", 20)
+        self.cell(0, 10, title, ln=True, align="C")
+        self.ln(10)
+        self.set_font("Arial", "I", 14)
+        self.cell(0, 10, subtitle, ln=True, align="C")
+        self.ln(20)
+        self.set_font("Arial", "", 12)
+        self.cell(0, 10, f"Date: {date}", ln=True, align="C")
+        self.ln(50)
+        self.set_font("Arial", "I", 12)
+        self.cell(0, 10, "Generated by AI Use Case Generator", align="C")
+        self.style = None
+
+    def use_style(self, name):
+        """
+        Switches text style, touching the font and color state only when the style changes.
+        Returns the style's line height.
+        """
+        family, style, size, line_height, color = STYLES[name]
+        if self.style != name:
+            self.set_font(family, style, size)
+            self.set_text_color(*color)
+            self.style = name
+        return line_height
+
+    def render_blocks(self, blocks):
+        """
+        Renders parsed blocks in a single pass.
+        """
+        for block in blocks:
+            text = latin1(block.text)
+            if block.kind == "section":
+                self.ln(2)
+                self.cell(0, self.use_style("section"), text, ln=True)
+                self.ln(2)
+            elif block.kind == "heading":
+                self.ln(2)
+                self.multi_cell(0, self.use_style("heading"), text)
+            elif block.kind == "paragraph":
+                self.multi_cell(0, self.use_style("body"), text)
+                self.ln(2)
+            elif block.kind == "field":
+                line_height = self.use_style("label")
+                self.write(line_height, latin1(block.label) + ": ")
+                self.use_style("body")
+                self.write(line_height, text)
+                self.ln(line_height)
+            elif block.kind == "bullet":
+                line_height = self.use_style("body")
+                self.set_x(self.l_margin + BULLET_INDENT)
+                self.multi_cell(0, line_height, "- " + text)
+            elif block.kind == "link":
+                line_height = self.use_style("link")
+                self.set_x(self.l_margin + BULLET_INDENT)
+                self.cell(0, line_height, text, link=block.url, ln=True)
+
+    def output_streaming(self, path):
+        """
+        Finishes the document, writing it to `path` through a temporary file in the same directory.
+        Pages are spilled to disk while drawing and the output is never held in memory as a whole.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        descriptor, temp_path = tempfile.mkstemp(suffix=".pdf.tmp", dir=directory)
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                self.buffer = StreamingBuffer(file)
+                self.close()
+            os.chmod(temp_path, 0o666 & ~_UMASK)  # mkstemp creates 0600; match a plain open()
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        finally:
+            if isinstance(self.pages, SpilledPages):
+                self.pages.close()
+        return path
+
+
+def research_blocks(research_data):
+    """
+    Blocks for the research part of the report.
+    """
+    blocks = [Block("section", "Industry Trends")]
+    blocks += [Block("bullet", trend) for trend in research_data.get("industry_trends", [])]
+    blocks.append(Block("section", "Competitors"))
+    blocks += [Block("bullet", competitor) for competitor in research_data.get("competitors", [])]
+    blocks.append(Block("section", "AI Insights"))
+    blocks += parse_markdown(research_data.get("ai_insights", ""))
+    return blocks
+
+
+def report_blocks(research_data, use_cases, resources):
+    """
+    The block model of the whole report body: research, use cases (Markdown) and resources (Markdown).
+    """
+    with telemetry.span("report.parse") as span:
+        blocks = (
+            research_blocks(research_data)
+            + [Block("section", "AI/GenAI Use Cases")] + parse_markdown(use_cases)
+            + [Block("section", "Relevant Datasets")] + parse_markdown(resources)
+        )
+        span.add("items", len(blocks))
+        return blocks
+
+
+def render_report(blocks, output_path, date, spill_pages=True):
+    """
+    Renders the cover page and body blocks to `output_path`, streaming pages to disk.
+    Layout and writing are traced as "report.layout" and "report.write".
+    """
+    with telemetry.span("report.layout", items=len(blocks)):
+        pdf = PDFReport()
+        if spill_pages:
+            pdf.pages = SpilledPages()
+        pdf.add_cover_page(
+            title="AI & GenAI Use Case Report",
+            subtitle="Industry Trends, Use Cases, and Resource Insights",
+            date=date,
+        )
+        pdf.add_page()
+        pdf.render_blocks(blocks)
+    with telemetry.span("report.write", pages=pdf.page_no()) as span:
+        pdf.output_streaming(output_path)
+        span.add("bytes", os.path.getsize(output_path))
+    return output_path
+
+
+def warm_up():
+    """
+    Loads the metrics of every font the report uses. FPDF reads them lazily per process, so bulk
+    rendering calls this once per worker instead of paying for it in the first report.
+    """
+    pdf = PDFReport()
+    pdf.add_page()
+    for family, style in {(family, style) for family, style, _, _, _ in STYLES.values()} | {("Arial", "I")}:
+        pdf.set_font(family, style, 12)
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+import telemetry
+
+# Cache configuration
+CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join(".cache", "responses.sqlite3"))
+CACHE_OFFLINE = os.getenv("RESPONSE_CACHE_OFFLINE", "0") == "1"  # Serve only from the cache
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "20000"))
+CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Time-to-live per provider, in seconds
+PROVIDER_TTLS = {
+    "serper": 24 * 3600,
+    "cohere": 7 * 24 * 3600,
+    "kaggle": 3 * 24 * 3600,
+    "huggingface": 3 * 24 * 3600,
+    "github": 24 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a response is not in the cache."""
+
+
+def normalize_payload(payload):
+    """
+    Normalizes a request payload so equivalent requests share a cache key.
+    """
+    if isinstance(payload, dict):
+        return {str(key): normalize_payload(value) for key, value in payload.items()}
+    if isinstance(payload, (list, tuple)):
+        return [normalize_payload(value) for value in payload]
+    if isinstance(payload, str):
+        return " ".join(payload.split())
+    return payload
+
+
+def make_key(provider, endpoint, payload):
+    """
+    Builds the cache key for a provider request.
+    """
+    body = json.dumps([provider, endpoint, normalize_payload(payload)], sort_keys=True, default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of provider responses with per-provider TTLs and LRU eviction.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttls=None, max_entries=CACHE_MAX_ENTRIES,
+                 max_bytes=CACHE_MAX_BYTES, offline=CACHE_OFFLINE):
+        self.path = path
+        self.ttls = dict(PROVIDER_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, provider TEXT, endpoint TEXT, value TEXT, "
+            "size INTEGER, created_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    def get(self, provider, endpoint, payload):
+        """
+        Returns (True, value) for a fresh cached response, otherwise (False, None).
+        """
+        key = make_key(provider, endpoint, payload)
+        ttl = self.ttls.get(provider, DEFAULT_TTL)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            value, created_at = row
+            if not self.offline and now - created_at > ttl:
+                # Expired entries are still served offline, where stale data beats none
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return False, None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return True, json.loads(value)
+
+    def set(self, provider, endpoint, payload, value):
+        """
+        Stores a provider response and evicts the least recently used entries when over budget.
+        """
+        key = make_key(provider, endpoint, payload)
+        body = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, endpoint, body, len(body), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def fetch(self, provider, endpoint, payload, func):
+        """
+        Returns the cached response for the request, calling `func` and caching its result on a miss.
+        Exceptions raised by `func` propagate and are never cached. Each call is traced as a
+        "<provider>.<endpoint>" span.
+        """
+        with telemetry.span(f"{provider}.{endpoint}", provider=provider) as span:
+            hit, value = self.get(provider, endpoint, payload)
+            span.set(cache="hit" if hit else "miss")
+            if hit:
+                return value
+            if self.offline:
+                raise CacheMiss(f"No cached {provider} response for {endpoint} (offline mode)")
+            value = func()
+            self.set(provider, endpoint, payload, value)
+            return value
+
+    def clear(self, provider=None):
+        """
+        Removes all cached responses, or only those of one provider.
+        """
+        with self._lock:
+            if provider:
+                self._conn.execute("DELETE FROM responses WHERE provider = ?", (provider,))
+            else:
+                self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def _evict(self):
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        stale = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Returns the process-wide response cache, opening it on first use.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
+
+
+def cached_call(provider, endpoint, payload, func):
+    """
+    Shortcut for `get_cache().fetch(...)`.
+    """
+    return get_cache().fetch(provider, endpoint, payload, func)
+
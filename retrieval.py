@@ -0,0 +1,108 @@
+import json
+import numpy as np
+
+import telemetry
+
+# Hybrid retrieval settings
+RRF_K = 60  # Reciprocal rank fusion damping; higher values flatten the difference between ranks
+HYBRID_CANDIDATES = 20  # Candidates taken from each retriever before fusion
+RERANK_CANDIDATES = 10  # Fused candidates rescored by the cross-encoder
+
+
+def encode_queries(model, queries, batch_size=64):
+    """
+    Encodes all queries in a single model call and returns a float32 matrix for FAISS.
+    """
+    with telemetry.span("embed.queries", items=len(queries)):
+        embeddings = model.encode(list(queries), batch_size=batch_size, convert_to_numpy=True)
+    return np.ascontiguousarray(embeddings, dtype="float32")
+
+
+def retrieve_contexts(index, model, chunks, queries, top_k=3, query_embeddings=None):
+    """
+    Retrieves the top-k chunks for many queries with one encode call and one FAISS search.
+    Returns one ranked list per query of {"chunk_id", "text", "distance"} dicts (lower distance is closer).
+    Pass `query_embeddings` to reuse embeddings already computed for the queries.
+    """
+    if not queries:
+        return []
+    if query_embeddings is None:
+        query_matrix = encode_queries(model, queries)
+    else:
+        query_matrix = np.ascontiguousarray(query_embeddings, dtype="float32").reshape(len(queries), -1)
+    with telemetry.span("faiss.search", items=len(queries)):
+        distances, indices = index.search(query_matrix, min(top_k, len(chunks)))
+
+    results = []
+    for row_distances, row_indices in zip(distances, indices):
+        results.append([
+            {"chunk_id": int(i), "text": chunks[i], "distance": float(d)}
+            for d, i in zip(row_distances, row_indices)
+            if 0 <= i < len(chunks)  # FAISS pads missing neighbours with -1
+        ])
+    return results
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """
+    Fuses ranked result lists by summing 1 / (k + rank) per chunk. Result dicts are merged, so a chunk
+    found by both retrievers keeps both its "distance" and "bm25" fields; the fused score is "score".
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, 1):
+            entry = fused.setdefault(result["chunk_id"], {"score": 0.0})
+            entry.update({key: value for key, value in result.items() if key not in entry})
+            entry["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)
+
+
+def rerank(reranker, query, results):
+    """
+    Reorders results by cross-encoder relevance to the query, stored as "rerank".
+    """
+    if not results:
+        return results
+    with telemetry.span("rerank.predict", items=len(results)):
+        scores = reranker.predict([(query, result["text"]) for result in results])
+    for result, score in zip(results, scores):
+        result["rerank"] = float(score)
+    return sorted(results, key=lambda result: result["rerank"], reverse=True)
+
+
+def hybrid_search(dense_search, lexical_index, queries, top_k=3, reranker=None, query_embeddings=None,
+                  candidates=HYBRID_CANDIDATES, rerank_candidates=RERANK_CANDIDATES):
+    """
+    Retrieves with dense search and BM25, fuses both rankings with reciprocal rank fusion and optionally
+    reranks the best fused candidates with a cross-encoder. Returns one ranked list per query.
+    `dense_search(queries, top_k, query_embeddings)` is e.g. retrieve_contexts bound to an index.
+    """
+    if not queries:
+        return []
+    dense = dense_search(queries, candidates, query_embeddings)
+    with telemetry.span("bm25.search", items=len(queries)):
+        lexical = lexical_index.search(queries, candidates)
+    results = []
+    for query, dense_row, lexical_row in zip(queries, dense, lexical):
+        fused = reciprocal_rank_fusion([dense_row, lexical_row])
+        if reranker is not None:
+            fused = rerank(reranker, query, fused[:rerank_candidates])
+        results.append(fused[:top_k])
+    return results
+
+
+def read_questions(path):
+    """
+    Reads one question per line, skipping blank lines.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def write_answers_jsonl(path, records):
+    """
+    Writes question/answer records as JSON lines.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
@@ -0,0 +1,147 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+
+from bm25 import tokenize
+
+# A cached answer is reused when a new question's cosine similarity to a cached one is at least this
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES = 1024
+SEMANTIC_CACHE_TTL = 24 * 60 * 60  # Seconds
+SEMANTIC_CACHE_CANDIDATES = 4  # Nearest cached questions checked for matching specific terms
+
+
+def specific_terms(question):
+    """
+    Returns the question's numbers, years and $tickers. Questions differing only in these ("revenue in 2022"
+    vs "revenue in 2023") embed almost identically but must not share an answer.
+    """
+    return frozenset(token for token in tokenize(question) if token.startswith("$") or any(c.isdigit() for c in token))
+
+
+def normalize_question(question):
+    return re.sub(r"\s+", " ", question.lower()).strip(" ?!.")
+
+
+class SemanticAnswerCache:
+    """
+    In-memory cache of answers keyed on (scope, question embedding). `scope` identifies what the answer
+    depends on besides the question, such as the document hash and generator settings.
+
+    Exact repeats (after normalizing case, whitespace and trailing punctuation) are found without encoding
+    the question; otherwise the question embedding is searched in the scope's own FAISS inner-product index,
+    and a similar question only counts if it has the same numbers and tickers (`specific_terms`).
+    Entries expire after `ttl` seconds and the least recently used are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, max_entries=SEMANTIC_CACHE_MAX_ENTRIES, ttl=SEMANTIC_CACHE_TTL):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # id -> {"scope", "question", "terms", "answer", "created_at"}, oldest use first
+        self.exact = {}  # (scope, normalized question) -> id
+        self.indexes = {}  # scope -> faiss.IndexIDMap2 over normalized question embeddings
+        self.next_id = 0
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lookup_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.array(embedding, dtype="float32").reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _remove(self, entry_id):
+        entry = self.entries.pop(entry_id)
+        self.exact.pop((entry["scope"], normalize_question(entry["question"])), None)
+        self.indexes[entry["scope"]].remove_ids(np.array([entry_id], dtype="int64"))
+
+    def _hit(self, entry_id):
+        entry = self.entries[entry_id]
+        if time.time() - entry["created_at"] > self.ttl:
+            self._remove(entry_id)
+            self.evictions += 1
+            return None
+        self.entries.move_to_end(entry_id)
+        return entry["answer"]
+
+    def get(self, scope, question, embed):
+        """
+        Returns (answer, embedding). `answer` is None on a miss. `embed(question)` is only called when the
+        question isn't an exact repeat; the embedding is returned so the caller can reuse it for retrieval.
+        """
+        start = time.perf_counter()
+        embedding = None
+        try:
+            with self._lock:
+                entry_id = self.exact.get((scope, normalize_question(question)))
+                answer = self._hit(entry_id) if entry_id is not None else None
+                if answer is not None:
+                    self.hits += 1
+                    self.exact_hits += 1
+                    return answer, None
+
+            embedding = embed(question)
+            with self._lock:
+                index = self.indexes.get(scope)
+                if index is not None and index.ntotal:
+                    terms = specific_terms(question)
+                    similarities, ids = index.search(self._normalize(embedding), min(SEMANTIC_CACHE_CANDIDATES, index.ntotal))
+                    for similarity, entry_id in zip(similarities[0], ids[0]):
+                        if similarity < self.threshold:
+                            break
+                        entry = self.entries.get(int(entry_id))
+                        if entry is None or entry["terms"] != terms:
+                            continue
+                        answer = self._hit(int(entry_id))
+                        if answer is not None:
+                            self.hits += 1
+                            return answer, embedding
+                self.misses += 1
+                return None, embedding
+        finally:
+            self.lookup_seconds += time.perf_counter() - start
+
+    def put(self, scope, question, embedding, answer):
+        """
+        Stores an answer. Pass the embedding returned by `get`.
+        """
+        with self._lock:
+            key = (scope, normalize_question(question))
+            if key in self.exact:
+                self._remove(self.exact[key])
+            vector = self._normalize(embedding)
+            if scope not in self.indexes:
+                self.indexes[scope] = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+            entry_id = self.next_id
+            self.next_id += 1
+            self.indexes[scope].add_with_ids(vector, np.array([entry_id], dtype="int64"))
+            self.entries[entry_id] = {
+                "scope": scope, "question": question, "terms": specific_terms(question), "answer": answer,
+                "created_at": time.time(),
+            }
+            self.exact[key] = entry_id
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "avg_lookup_ms": 1000 * self.lookup_seconds / lookups if lookups else 0.0,
+        }
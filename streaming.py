@@ -0,0 +1,73 @@
+import json
+import time
+
+import http_client
+
+
+class TimedStream:
+    """
+    Wraps a stream of text pieces, recording time to first token and total time from when the stream
+    was created. The full text is available in `text` once the stream is consumed.
+    """
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.start = time.perf_counter()
+        self.ttft = None  # Seconds until the first non-empty piece
+        self.elapsed = None  # Seconds until the stream finished
+        self.parts = []
+
+    def __iter__(self):
+        for piece in self.pieces:
+            if piece and self.ttft is None:
+                self.ttft = time.perf_counter() - self.start
+            self.parts.append(piece)
+            yield piece
+        self.elapsed = time.perf_counter() - self.start
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def summary(self):
+        ttft = f"{self.ttft:.2f}s" if self.ttft is not None else "n/a"
+        elapsed = f"{self.elapsed:.2f}s" if self.elapsed is not None else "n/a"
+        return f"first token after {ttft}, complete after {elapsed}"
+
+
+def iter_sse_data(response):
+    """
+    Yields the decoded JSON payload of each `data:` line of a server-sent events response.
+    """
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        yield json.loads(data)
+
+
+def stream_hf_generation(url, token, inputs, parameters):
+    """
+    Streams generated text from a Hugging Face inference endpoint as it is produced.
+    Models served without token streaming return the whole answer at once, which is yielded as one piece.
+    """
+    response = http_client.post(
+        url,
+        headers={"Authorization": f"Bearer {token}"},
+        json={"inputs": inputs, "parameters": parameters, "stream": True},
+        stream=True,
+    )
+    with response:
+        response.raise_for_status()
+        if "text/event-stream" not in response.headers.get("Content-Type", ""):
+            yield response.json()[0]["generated_text"]
+            return
+        for event in iter_sse_data(response):
+            if "error" in event:
+                raise RuntimeError(event["error"])
+            token_info = event.get("token") or {}
+            if token_info.get("text") and not token_info.get("special"):
+                yield token_info["text"]
+
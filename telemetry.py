@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import threading
+import contextvars
+import multiprocessing.util
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Tracing configuration
+TRACE_FILE = os.getenv("TRACE_FILE", "")  # JSONL spans go to this path with the pid added, e.g. traces/trace.<pid>.jsonl; off when empty
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(100 * 1024 * 1024)))  # Each process's file is rotated to <file>.1 past this size
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # Serves Prometheus text metrics on /metrics; 0 to disable
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # Seconds
+SAMPLES_PER_SPAN = 10000  # Most recent durations kept per span name for percentiles
+
+# Numeric span attributes that are summed into counters
+COUNTERS = ("bytes", "tokens_in", "tokens_out", "retries", "items")
+
+RUN_ID = uuid.uuid4().hex[:16]
+_run = {"name": None, "started": time.time()}
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed operation. Attributes describe it (provider, sizes, cache result, ...); numeric ones named
+    in COUNTERS are also summed per span name.
+    """
+
+    def __init__(self, name, parent, attrs):
+        self.name = name
+        self.id = uuid.uuid4().hex[:16]
+        self.parent = parent.id if parent is not None else None
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key, amount=1):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+
+class SpanStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.samples = deque(maxlen=SAMPLES_PER_SPAN)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def percentile(self, fraction):
+        ordered = sorted(self.samples)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+class Metrics:
+    """
+    Per span name latency histograms and counters for this process.
+    """
+
+    def __init__(self):
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, attrs, error=None):
+        with self._lock:
+            stats = self.spans.setdefault(name, SpanStats())
+            stats.count += 1
+            stats.seconds += seconds
+            stats.samples.append(seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats.buckets[i] += 1
+                    break
+            if error:
+                stats.errors += 1
+            for key in COUNTERS:
+                if isinstance(attrs.get(key), (int, float)):
+                    stats.counters[key] += attrs[key]
+            if attrs.get("cache") == "hit":
+                stats.cache_hits += 1
+            elif attrs.get("cache") == "miss":
+                stats.cache_misses += 1
+
+    def snapshot(self):
+        with self._lock:
+            return sorted(self.spans.items(), key=lambda item: item[1].seconds, reverse=True)
+
+    def prometheus(self):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        lines = ["# TYPE agent_span_seconds histogram"]
+        snapshot = self.snapshot()
+        for name, stats in snapshot:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += count
+                lines.append(f'agent_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'agent_span_seconds_bucket{{span="{name}",le="+Inf"}} {stats.count}')
+            lines.append(f'agent_span_seconds_sum{{span="{name}"}} {stats.seconds:.6f}')
+            lines.append(f'agent_span_seconds_count{{span="{name}"}} {stats.count}')
+        series = [
+            ("agent_span_errors_total", lambda stats: [("", stats.errors)]),
+            ("agent_span_bytes_total", lambda stats: [("", stats.counters["bytes"])]),
+            ("agent_span_items_total", lambda stats: [("", stats.counters["items"])]),
+            ("agent_span_retries_total", lambda stats: [("", stats.counters["retries"])]),
+            ("agent_tokens_total", lambda stats: [
+                (',direction="in"', stats.counters["tokens_in"]), (',direction="out"', stats.counters["tokens_out"])
+            ]),
+            ("agent_cache_lookups_total", lambda stats: [
+                (',result="hit"', stats.cache_hits), (',result="miss"', stats.cache_misses)
+            ]),
+        ]
+        for metric, values in series:
+            lines.append(f"# TYPE {metric} counter")
+            for name, stats in snapshot:
+                for labels, value in values(stats):
+                    lines.append(f'{metric}{{span="{name}"{labels}}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+_trace = {"file": None, "path": None, "bytes": 0}
+_trace_lock = threading.Lock()
+
+
+def trace_path(pid=None):
+    """
+    Returns the trace file of a process. Each process (job workers, report pool workers) writes and
+    rotates its own file, so processes never share or rename each other's files.
+    """
+    root, extension = os.path.splitext(TRACE_FILE)
+    return f"{root}.{pid or os.getpid()}{extension}"
+
+
+def _write(record):
+    if not TRACE_FILE:
+        return
+    line = json.dumps(record, default=str) + "\n"  # ASCII (ensure_ascii), so len() is the byte count
+    with _trace_lock:
+        if _trace["file"] is None:
+            _trace["path"] = trace_path()
+            directory = os.path.dirname(_trace["path"])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            _trace["file"] = open(_trace["path"], "a", encoding="utf-8")
+            _trace["bytes"] = _trace["file"].tell()
+            atexit.register(_close_trace)
+            # multiprocessing workers exit without atexit handlers but do run its finalizers
+            multiprocessing.util.Finalize(None, _close_trace, exitpriority=0)
+        _trace["file"].write(line)  # Buffered; flushed when full, on rotation and at exit
+        _trace["bytes"] += len(line)
+        if _trace["bytes"] >= TRACE_MAX_BYTES:
+            _trace["file"].close()
+            os.replace(_trace["path"], _trace["path"] + ".1")
+            _trace["file"], _trace["bytes"] = open(_trace["path"], "a", encoding="utf-8"), 0
+
+
+def _close_trace():
+    with _trace_lock:
+        if _trace["file"] is not None:
+            _trace["file"].close()
+            _trace["file"] = None
+
+
+def _before_fork():
+    _trace_lock.acquire()
+    if _trace["file"] is not None:
+        _trace["file"].flush()  # So a forked child doesn't inherit, and later write out, this process's buffer
+
+
+def _after_fork_in_child():
+    if _trace["file"] is not None:
+        _trace["file"].close()  # The child opens its own file on its first span
+        _trace["file"] = None
+    _trace_lock.release()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_before_fork, after_in_parent=_trace_lock.release, after_in_child=_after_fork_in_child)
+
+
+def _finish(span, start_time, seconds, error):
+    metrics.record(span.name, seconds, span.attrs, error)
+    _write(dict(
+        span.attrs, run=RUN_ID, run_name=_run["name"], span=span.id, parent=span.parent, name=span.name,
+        start=start_time, seconds=round(seconds, 6), thread=threading.current_thread().name, pid=os.getpid(),
+        error=error,
+    ))
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Times the enclosed block as a span named `name` (e.g. "serper.search", "faiss.search"), written to the
+    trace file and added to the metrics. Spans opened inside it on the same thread become its children.
+    Exceptions are recorded on the span and re-raised.
+    """
+    current = Span(name, _current.get(), attrs)
+    token = _current.set(current)
+    start_time, start = time.time(), time.perf_counter()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        _finish(current, start_time, time.perf_counter() - start, error)
+
+
+def record(name, seconds, error=None, **attrs):
+    """
+    Records an operation timed by the caller, for work that can't be wrapped in `span`, such as a
+    generator that yields between its steps or a result reported by another process.
+    """
+    _finish(Span(name, _current.get(), attrs), time.time() - seconds, seconds, error)
+
+
+def annotate(**attrs):
+    """
+    Adds attributes to the innermost open span, if any. Counter attributes are summed.
+    """
+    current = _current.get()
+    if current is None:
+        return
+    for key, value in attrs.items():
+        if key in COUNTERS:
+            current.add(key, value)
+        else:
+            current.set(**{key: value})
+
+
+def summary():
+    """
+    Formats the per span name statistics of this run, slowest total first, followed by the total time
+    of each component (the span name up to the first dot, e.g. the provider).
+    """
+    snapshot = metrics.snapshot()
+    if not snapshot:
+        return "No spans recorded."
+    header = (f"{'span':<28} {'count':>6} {'total s':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} "
+              f"{'errors':>6} {'retries':>7} {'cache hit':>9} {'tokens in/out':>15} {'KB':>8}")
+    lines = [f"Telemetry for {_run['name'] or 'run'} {RUN_ID} ({time.time() - _run['started']:.1f}s wall)", header, "-" * len(header)]
+    components = {}
+    for name, stats in snapshot:
+        lookups = stats.cache_hits + stats.cache_misses
+        cache = f"{stats.cache_hits / lookups:.0%}" if lookups else "-"
+        tokens = f"{stats.counters['tokens_in']}/{stats.counters['tokens_out']}"
+        lines.append(
+            f"{name:<28} {stats.count:>6} {stats.seconds:>8.2f} {1000 * stats.percentile(0.5):>8.1f} "
+            f"{1000 * stats.percentile(0.95):>8.1f} {1000 * max(stats.samples, default=0):>8.1f} {stats.errors:>6} "
+            f"{stats.counters['retries']:>7} {cache:>9} {tokens:>15} {stats.counters['bytes'] / 1024:>8.1f}"
+        )
+        component = name.split(".")[0]
+        components[component] = components.get(component, 0.0) + stats.seconds
+    shares = sorted(components.items(), key=lambda item: item[1], reverse=True)
+    lines.append("Total time by component (nested spans are counted in each): " + ", ".join(
+        f"{component} {seconds:.2f}s" for component, seconds in shares
+    ))
+    return "\n".join(lines)
+
+
+def print_summary():
+    print("\n" + summary())
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes are not worth a log line each
+
+
+_server = None
+
+
+def serve_metrics(port=METRICS_PORT):
+    """
+    Serves /metrics on `port` from a background thread, once per process. Returns the server.
+    """
+    global _server
+    if _server is None and port:
+        _server = ThreadingHTTPServer(("", port), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
+
+
+def start_run(name, print_at_exit=True):
+    """
+    Names this process's run in the trace, starts the metrics endpoint if METRICS_PORT is set, and prints
+    the summary when the process exits.
+    """
+    _run["name"], _run["started"] = name, time.time()
+    serve_metrics()
+    if print_at_exit:
+        atexit.register(print_summary)
+    return RUN_ID